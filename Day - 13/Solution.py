@@ -6,6 +6,15 @@
 import uuid
 import docker
 import time
+import sys
+import queue
+import argparse
+import threading
+
+# Log multiplexer settings
+LOG_QUEUE_SIZE = 10000   # Bounded queue: stream readers block when it is full
+LOG_BATCH_SIZE = 500     # Max lines written per batch
+LOG_FLUSH_INTERVAL = 0.2 # Seconds to wait before flushing a partial batch
 
 def manage_containers():
     # Connect to the local Docker daemon
@@ -65,9 +74,108 @@ def manage_containers():
     finally:
         client.close()
 
+def stream_container_logs(container, log_queue, stop_event):
+    """Follow one container's log stream and push complete lines onto the shared queue"""
+    name = container.name
+    # docker-py yields frames/chunks, not lines: one chunk may hold several
+    # lines or only part of one, so lines are reassembled per container
+    partial = b""
+    try:
+        for chunk in container.logs(stream=True, follow=True, tail=0):
+            if stop_event.is_set():
+                break
+            *lines, partial = (partial + chunk).split(b"\n")
+            for line in lines:
+                # Blocking put gives backpressure: a full queue slows this reader down
+                log_queue.put((name, line))
+    except docker.errors.DockerException as e:
+        if partial:
+            log_queue.put((name, partial))
+            partial = b""
+        log_queue.put((name, f"<log stream error: {e}>".encode('utf-8')))
+    finally:
+        if partial:
+            # Last line of a stream that ended without a newline
+            log_queue.put((name, partial))
+        # None marks the end of this container's stream
+        log_queue.put((name, None))
+
+def write_log_batches(log_queue, stream_count, out=sys.stdout,
+                      batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+    """Drain the queue and write prefixed lines in batches until all streams end"""
+    open_streams = stream_count
+    while open_streams > 0:
+        batch = []
+        try:
+            # Wait for the first line, then grab whatever else is already queued
+            batch.append(log_queue.get(timeout=flush_interval))
+            while len(batch) < batch_size:
+                batch.append(log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        lines = []
+        for name, line in batch:
+            if line is None:
+                open_streams -= 1
+                continue
+            text = line.decode('utf-8', errors='replace').rstrip('\r')
+            lines.append(f"[{name}] {text}\n")
+        if lines:
+            out.write("".join(lines))
+            out.flush()
+
+def multiplex_container_logs(containers, queue_size=LOG_QUEUE_SIZE,
+                             batch_size=LOG_BATCH_SIZE, out=sys.stdout):
+    """Follow the logs of many containers concurrently, one reader thread per stream"""
+    log_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    readers = [
+        threading.Thread(
+            target=stream_container_logs,
+            args=(container, log_queue, stop_event),
+            name=f"logs-{container.name}",
+            daemon=True
+        )
+        for container in containers
+    ]
+    for reader in readers:
+        reader.start()
+
+    try:
+        write_log_batches(log_queue, len(readers), out=out, batch_size=batch_size)
+    except KeyboardInterrupt:
+        print("\nStopping log streams...")
+    finally:
+        stop_event.set()
+
+def follow_containers(names=None):
+    """Multiplex logs from the named containers, or from every running container"""
+    client = docker.from_env()
+    try:
+        if names:
+            containers = [client.containers.get(name) for name in names]
+        else:
+            containers = client.containers.list()
+        if not containers:
+            print("No running containers to follow")
+            return
+        print(f"Following logs from {len(containers)} container(s)")
+        multiplex_container_logs(containers)
+    finally:
+        client.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and destroy Docker containers")
+    parser.add_argument("--follow", nargs="*", metavar="CONTAINER",
+                        help="Multiplex logs from these containers (all running if none given)")
+    args = parser.parse_args()
+
     try:
-        manage_containers()
+        if args.follow is not None:
+            follow_containers(args.follow)
+        else:
+            manage_containers()
     except docker.errors.DockerException as e:
         print(f"Error interacting with Docker: {e}")
     except Exception as e:
@@ -0,0 +1,37 @@
+import io
+import unittest
+
+from Solution import multiplex_container_logs
+
+class StubContainer:
+    """Container stand-in whose log stream yields the given raw chunks"""
+
+    def __init__(self, name, chunks):
+        self.name = name
+        self.chunks = chunks
+
+    def logs(self, **kwargs):
+        return iter(self.chunks)
+
+class TestMultiplexContainerLogs(unittest.TestCase):
+    def follow(self, *containers):
+        out = io.StringIO()
+        multiplex_container_logs(containers, out=out)
+        return out.getvalue().splitlines()
+
+    def test_prefixes_whole_lines_across_split_and_merged_chunks(self):
+        lines = self.follow(
+            # Multiplexed frames: several lines in one frame, a line split across frames
+            StubContainer("web", [b"GET / 200\nGET /a 2", b"00\nGET /b", b" 404\n"]),
+            # TTY stream: tiny raw chunks with \r\n line endings and no final newline
+            StubContainer("db", [b"rea", b"dy\r", b"\nche", b"ckpoint", b" done"]),
+        )
+
+        self.assertEqual([line for line in lines if line.startswith("[web] ")],
+                         ["[web] GET / 200", "[web] GET /a 200", "[web] GET /b 404"])
+        self.assertEqual([line for line in lines if line.startswith("[db] ")],
+                         ["[db] ready", "[db] checkpoint done"])
+        self.assertEqual(len(lines), 5)
+
+if __name__ == '__main__':
+    unittest.main()
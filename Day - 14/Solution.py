@@ -7,16 +7,38 @@
 import os
 import shutil
 import gzip
+import glob
+import json
+import time
+import signal
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import platform
 
 NGINX_LOG_DIR = "/var/log/nginx"
 ARCHIVE_DIR = "/var/log/nginx/archive"
 LOG_FILES = ["access.log", "error.log"]
+COMPRESS_WORKERS = 4  # Background gzip workers used by the rename mode
+REOPEN_GRACE = 5      # Seconds to let Nginx workers switch to the new files before compressing
+
+# Daemon mode settings
+MAX_LOG_SIZE = 100 * 1024 * 1024       # Rotate a log once it reaches this many bytes
+MAX_LOG_AGE = 24 * 60 * 60             # ...or once it is this many seconds old
+CHECK_INTERVAL = 30                    # Seconds between threshold checks
+ARCHIVE_MAX_FILES = 200                # Retention: max number of archived logs
+ARCHIVE_MAX_BYTES = 10 * 1024 ** 3     # Retention: max total archive size
+ARCHIVE_INDEX = "index.json"           # Archive index kept inside ARCHIVE_DIR
+
+def reopen_nginx_logs():
+    # Signal Nginx to reopen logs (only on Linux)
+    if platform.system() == "Linux":
+        os.system("nginx -s reopen")
 
 def rotate_and_archive():
-    if not os.path.exists(ARCHIVE_DIR):
-        os.makedirs(ARCHIVE_DIR)
+    index = ArchiveIndex()
     for log in LOG_FILES:
         log_path = os.path.join(NGINX_LOG_DIR, log)
         if os.path.exists(log_path):
@@ -28,9 +50,251 @@ def rotate_and_archive():
                 shutil.copyfileobj(f_in, f_out)
             # Truncate original log
             open(log_path, 'w').close()
-    # Signal Nginx to reopen logs (only on Linux)
-    if platform.system() == "Linux":
-        os.system("nginx -s reopen")
+            index.add(archived_path)
+            index.mark_rotated(log, time.time())
+    reopen_nginx_logs()
+    index.save()
+
+def rename_logs(log_names):
+    """Atomically move live logs into the archive dir; returns the renamed paths"""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    renamed = []
+    for log in log_names:
+        log_path = os.path.join(NGINX_LOG_DIR, log)
+        if not os.path.exists(log_path):
+            continue
+        rotated_path = os.path.join(ARCHIVE_DIR, f"{log}.{timestamp}")
+        # rename() is atomic on the same filesystem; Nginx keeps writing to the
+        # open file descriptor until it is told to reopen
+        os.replace(log_path, rotated_path)
+        renamed.append(rotated_path)
+    return renamed
+
+def compress_file(path):
+    """Gzip a rotated log next to itself and remove the uncompressed copy"""
+    gz_path = f"{path}.gz"
+    tmp_path = f"{gz_path}.tmp"
+    with open(path, 'rb') as f_in, gzip.open(tmp_path, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    os.replace(tmp_path, gz_path)
+    os.remove(path)
+    return gz_path
+
+def compress_in_background(paths, workers=COMPRESS_WORKERS):
+    """Submit rotated logs to a gzip worker pool; returns the executor and futures"""
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gzip")
+    futures = [executor.submit(compress_file, path) for path in paths]
+    return executor, futures
+
+def rotate_by_rename(log_names=LOG_FILES, workers=COMPRESS_WORKERS, grace=REOPEN_GRACE):
+    index = ArchiveIndex()
+    # Critical section: one rename per log and a single reopen signal
+    renamed = rename_logs(log_names)
+    if not renamed:
+        return []
+    reopen_nginx_logs()
+    now = time.time()
+    for path in renamed:
+        index.mark_rotated(os.path.basename(path).rsplit(".", 1)[0], now)
+
+    # "nginx -s reopen" only signals the master; workers reopen their logs
+    # asynchronously and keep appending to the renamed files until they do.
+    # Compressing (and deleting) them right away would lose those lines.
+    time.sleep(grace)
+    executor, futures = compress_in_background(renamed, workers)
+    archived = []
+    try:
+        for future in futures:
+            try:
+                archived.append(future.result())
+                index.add(archived[-1])
+            except OSError as e:
+                print(f"Failed to compress rotated log: {e}")
+    finally:
+        executor.shutdown()
+        index.save()
+    return archived
+
+class ArchiveIndex:
+    """Tracks archived logs and per-log rotation times without re-listing ARCHIVE_DIR"""
+
+    def __init__(self, archive_dir=None, index_name=ARCHIVE_INDEX):
+        self.archive_dir = archive_dir or ARCHIVE_DIR
+        self.index_path = os.path.join(self.archive_dir, index_name)
+        self.entries = deque()   # (name, size, archived_at), oldest first
+        self.total_bytes = 0
+        self.last_rotated = {}
+        self.dirty = False       # Changed since the last save
+        self._lock = threading.Lock()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            entries = data.get("archives", [])
+            self.last_rotated = data.get("last_rotated", {})
+        except (OSError, ValueError):
+            # No usable index yet: build it from a single directory listing
+            entries = []
+            for name in os.listdir(self.archive_dir):
+                if name.endswith(".gz"):
+                    stat = os.stat(os.path.join(self.archive_dir, name))
+                    entries.append([name, stat.st_size, stat.st_mtime])
+            entries.sort(key=lambda entry: entry[2])
+        for name, size, archived_at in entries:
+            self.entries.append((name, size, archived_at))
+            self.total_bytes += size
+
+    def save(self):
+        with self._lock:
+            data = {
+                "archives": [list(entry) for entry in self.entries],
+                "last_rotated": dict(self.last_rotated),
+            }
+            self.dirty = False
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def add(self, path):
+        size = os.path.getsize(path)
+        with self._lock:
+            self.entries.append((os.path.basename(path), size, time.time()))
+            self.total_bytes += size
+            self.dirty = True
+
+    def mark_rotated(self, log_name, when):
+        with self._lock:
+            self.last_rotated[log_name] = when
+            self.dirty = True
+
+    def enforce_retention(self, max_files=ARCHIVE_MAX_FILES, max_bytes=ARCHIVE_MAX_BYTES):
+        """Delete the oldest archives until both limits hold; returns removed names"""
+        removed = []
+        with self._lock:
+            while self.entries and (len(self.entries) > max_files or self.total_bytes > max_bytes):
+                name, size, _ = self.entries.popleft()
+                self.total_bytes -= size
+                removed.append(name)
+                self.dirty = True
+        for name in removed:
+            try:
+                os.remove(os.path.join(self.archive_dir, name))
+            except FileNotFoundError:
+                pass
+        return removed
+
+def logs_due_for_rotation(index, max_size=MAX_LOG_SIZE, max_age=MAX_LOG_AGE, now=None):
+    """Return the *.log names in NGINX_LOG_DIR that crossed the size or age threshold"""
+    now = time.time() if now is None else now
+    due = []
+    for log_path in glob.glob(os.path.join(NGINX_LOG_DIR, "*.log")):
+        log = os.path.basename(log_path)
+        try:
+            size = os.path.getsize(log_path)
+        except FileNotFoundError:
+            continue
+        if log not in index.last_rotated:
+            # First time we see this log: start its age clock now
+            index.mark_rotated(log, now)
+        if size == 0:
+            continue
+        if size >= max_size or now - index.last_rotated[log] >= max_age:
+            due.append(log)
+    return due
+
+def run_rotation_daemon(max_size=MAX_LOG_SIZE, max_age=MAX_LOG_AGE, interval=CHECK_INTERVAL,
+                        max_files=ARCHIVE_MAX_FILES, max_bytes=ARCHIVE_MAX_BYTES,
+                        workers=COMPRESS_WORKERS, grace=REOPEN_GRACE):
+    index = ArchiveIndex()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gzip")
+    # Renamed logs wait here until Nginx workers have surely switched files
+    # (like logrotate's delaycompress): (compress after, path)
+    awaiting_compression = deque()
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    # SIGTERM is how service managers stop a daemon; shut down as cleanly as on Ctrl+C
+    signal.signal(signal.SIGTERM, request_stop)
+
+    def compress_ready(now):
+        while awaiting_compression and awaiting_compression[0][0] <= now:
+            _, path = awaiting_compression.popleft()
+            executor.submit(compress_file, path).add_done_callback(archive_done)
+
+    def archive_done(future):
+        try:
+            index.add(future.result())
+        except OSError as e:
+            print(f"Failed to compress rotated log: {e}")
+
+    print(f"Watching {NGINX_LOG_DIR}/*.log (max size {max_size} bytes, max age {max_age}s)")
+    try:
+        while not stop.is_set():
+            due = logs_due_for_rotation(index, max_size, max_age)
+            if due:
+                # All logs due in this cycle share one rename pass and one reopen signal
+                renamed = rename_logs(due)
+                reopen_nginx_logs()
+                now = time.time()
+                for log in due:
+                    index.mark_rotated(log, now)
+                for path in renamed:
+                    awaiting_compression.append((now + grace, path))
+                print(f"Rotated {len(renamed)} log(s): {', '.join(due)}")
+            compress_ready(time.time())
+
+            removed = index.enforce_retention(max_files, max_bytes)
+            if removed:
+                print(f"Retention removed {len(removed)} archive(s)")
+            # Also persists archives added by compressions that finished since the last cycle
+            if index.dirty:
+                index.save()
+            stop.wait(interval)
+        print("\nStopping rotation daemon...")
+    except KeyboardInterrupt:
+        print("\nStopping rotation daemon...")
+    finally:
+        if awaiting_compression:
+            time.sleep(max(0, awaiting_compression[-1][0] - time.time()))
+            compress_ready(float("inf"))
+        executor.shutdown()
+        index.enforce_retention(max_files, max_bytes)
+        index.save()
 
 if __name__ == "__main__":
-    rotate_and_archive()
+    parser = argparse.ArgumentParser(description="Rotate and archive Nginx logs")
+    parser.add_argument("--mode", choices=["copy", "rename", "daemon"], default="copy",
+                        help="copy: gzip then truncate (default); "
+                             "rename: rename, reopen Nginx, gzip in the background; "
+                             "daemon: keep running and rotate on size/age thresholds")
+    parser.add_argument("--workers", type=int, default=COMPRESS_WORKERS,
+                        help=f"Compression workers for rename mode (default: {COMPRESS_WORKERS})")
+    parser.add_argument("--compress-delay", type=float, default=REOPEN_GRACE,
+                        help=f"Rename/daemon: seconds to wait after reopening Nginx logs before "
+                             f"compressing the rotated files (default: {REOPEN_GRACE})")
+    parser.add_argument("--max-size", type=int, default=MAX_LOG_SIZE,
+                        help="Daemon: rotate logs larger than this many bytes")
+    parser.add_argument("--max-age", type=int, default=MAX_LOG_AGE,
+                        help="Daemon: rotate logs older than this many seconds")
+    parser.add_argument("--interval", type=int, default=CHECK_INTERVAL,
+                        help="Daemon: seconds between checks")
+    parser.add_argument("--keep-files", type=int, default=ARCHIVE_MAX_FILES,
+                        help="Daemon: max number of archived logs to keep")
+    parser.add_argument("--keep-bytes", type=int, default=ARCHIVE_MAX_BYTES,
+                        help="Daemon: max total size of the archive directory")
+    args = parser.parse_args()
+
+    if args.mode == "daemon":
+        run_rotation_daemon(args.max_size, args.max_age, args.interval,
+                            args.keep_files, args.keep_bytes, args.workers, args.compress_delay)
+    elif args.mode == "rename":
+        rotate_by_rename(workers=args.workers, grace=args.compress_delay)
+    else:
+        rotate_and_archive()
@@ -4,39 +4,71 @@
 # Example Hint:ssl module
 
 import ssl
+import sys
+import csv
+import json
+import time
 import socket
+import asyncio
+import sqlite3
+import hashlib
 import argparse
+from collections import defaultdict
 from datetime import datetime
 
-def get_ssl_certificate_info(hostname, port=443, timeout=10):
-    context = ssl.create_default_context()
+# Bulk scan defaults
+BULK_CONCURRENCY = 500   # Max handshakes in flight overall
+BULK_PER_IP = 4          # Max handshakes in flight per resolved IP
+RESULT_FIELDS = ['host', 'port', 'ip', 'status', 'common_name', 'fingerprint', 'not_after',
+                 'days_remaining', 'is_valid', 'last_checked', 'error']
+
+# Recheck schedule for the result cache: (days remaining at most, seconds until next check)
+RECHECK_SCHEDULE = [
+    (0, 60 * 60),               # Expired: hourly
+    (7, 6 * 60 * 60),           # Expiring this week: every 6 hours
+    (30, 24 * 60 * 60),         # Expiring this month: daily
+    (90, 7 * 24 * 60 * 60),     # Expiring this quarter: weekly
+]
+RECHECK_MAX_INTERVAL = 30 * 24 * 60 * 60  # Everything else: monthly
+RECHECK_ERROR_INTERVAL = 60 * 60          # Failed checks are retried hourly
+
+def parse_certificate(cert):
+    """Turn a getpeercert() dict into the checker's certificate info dict"""
+    if not cert:
+        raise ValueError("No certificate received from the server")
+
+    # Parse certificate dates
+    not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
+    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+
+    current_time = datetime.utcnow()
+    days_remaining = (not_after - current_time).days
+
+    return {
+        'subject': dict(x[0] for x in cert['subject']),
+        'issuer': dict(x[0] for x in cert['issuer']),
+        'not_before': not_before,
+        'not_after': not_after,
+        'days_remaining': days_remaining,
+        'is_valid': current_time >= not_before and current_time <= not_after,
+        'serial_number': cert.get('serialNumber', ''),
+        'version': cert.get('version', '')
+    }
+
+def certificate_fingerprint(der_cert):
+    """SHA-256 fingerprint of a DER-encoded certificate"""
+    return hashlib.sha256(der_cert).hexdigest() if der_cert else ''
+
+def get_ssl_certificate_info(hostname, port=443, timeout=10, context=None):
+    context = context or ssl.create_default_context()
     
     try:
         # Set a timeout for the connection
         with socket.create_connection((hostname, port), timeout=timeout) as sock:
             with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                
-                if not cert:
-                    raise ValueError("No certificate received from the server")
-                
-                # Parse certificate dates
-                not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
-                not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                
-                current_time = datetime.utcnow()
-                days_remaining = (not_after - current_time).days
-                
-                return {
-                    'subject': dict(x[0] for x in cert['subject']),
-                    'issuer': dict(x[0] for x in cert['issuer']),
-                    'not_before': not_before,
-                    'not_after': not_after,
-                    'days_remaining': days_remaining,
-                    'is_valid': current_time >= not_before and current_time <= not_after,
-                    'serial_number': cert.get('serialNumber', ''),
-                    'version': cert.get('version', '')
-                }
+                info = parse_certificate(ssock.getpeercert())
+                info['fingerprint'] = certificate_fingerprint(ssock.getpeercert(binary_form=True))
+                return info
                 
     except socket.timeout:
         raise ConnectionError(f"Connection to {hostname}:{port} timed out after {timeout} seconds")
@@ -61,20 +93,286 @@ def print_certificate_info(info, verbose=False):
         print(f"- Serial Number: {info['serial_number']}")
         print(f"- Version: {info['version']}")
 
+def read_hosts_file(path, default_port=443):
+    """
+    Yield (host, port) pairs from a file with one host per line: host, host:port,
+    a bare IPv6 address, or [IPv6] / [IPv6]:port
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith('['):
+                host, _, rest = line[1:].partition(']')
+                port = rest[1:] if rest.startswith(':') else ''
+            elif line.count(':') == 1:
+                host, port = line.split(':')
+            else:
+                host, port = line, ''  # a bare IPv6 address has no port
+            if port.isdigit():
+                yield host, int(port)
+            else:
+                yield (host if line.startswith('[') else line), default_port
+
+async def fetch_certificate_async(hostname, port, context, timeout, ip_limits):
+    """Resolve, handshake and parse one host's certificate; resolving and the handshake each get `timeout`"""
+    loop = asyncio.get_running_loop()
+    result = {'host': hostname, 'port': port, 'ip': ''}
+
+    async def handshake(ip):
+        reader, writer = await asyncio.open_connection(
+            ip, port, ssl=context, server_hostname=hostname
+        )
+        try:
+            ssl_object = writer.get_extra_info('ssl_object')
+            return ssl_object.getpeercert(), ssl_object.getpeercert(binary_form=True)
+        finally:
+            writer.close()
+
+    try:
+        addr_info = await asyncio.wait_for(
+            loop.getaddrinfo(hostname, port, type=socket.SOCK_STREAM), timeout)
+        ip = addr_info[0][4][0]
+        result['ip'] = ip
+        # Per-IP semaphore keeps many names on one load balancer from being hammered.
+        # Waiting for a slot is not part of the host's timeout; only the handshake is.
+        async with ip_limits[ip]:
+            cert, der_cert = await asyncio.wait_for(handshake(ip), timeout)
+        info = parse_certificate(cert)
+        result.update({
+            'status': 'ok',
+            'common_name': info['subject'].get('commonName', ''),
+            'fingerprint': certificate_fingerprint(der_cert),
+            'not_after': info['not_after'].isoformat(),
+            'days_remaining': info['days_remaining'],
+            'is_valid': info['is_valid'],
+            'error': '',
+        })
+    except asyncio.TimeoutError:
+        result.update({'status': 'error', 'error': f"timed out after {timeout} seconds"})
+    except (OSError, ssl.SSLError, ValueError) as e:
+        result.update({'status': 'error', 'error': str(e) or type(e).__name__})
+    result['last_checked'] = datetime.utcnow().isoformat(timespec='seconds')
+    return result
+
+async def scan_hosts_async(hosts, on_result, concurrency=BULK_CONCURRENCY,
+                           per_ip=BULK_PER_IP, timeout=10, context=None):
+    """Check (host, port) pairs concurrently and hand each result to on_result as it finishes"""
+    context = context or ssl.create_default_context()
+    ip_limits = defaultdict(lambda: asyncio.Semaphore(per_ip))
+    # Bounded queue + fixed worker count caps concurrency without creating a task per host
+    pending = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            hostname, port = item
+            on_result(await fetch_certificate_async(hostname, port, context, timeout, ip_limits))
+
+    async def produce():
+        for host_port in hosts:
+            await pending.put(host_port)
+        for _ in range(concurrency):
+            await pending.put(None)
+
+    # If on_result raises (e.g. BrokenPipeError on a closed stdout), the error
+    # propagates here and the producer and remaining workers are cancelled,
+    # instead of the producer waiting forever on a queue nobody reads
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def recheck_interval(days_remaining):
+    """Seconds until a certificate with this many days left should be checked again"""
+    if days_remaining is None:
+        return RECHECK_ERROR_INTERVAL
+    for max_days, interval in RECHECK_SCHEDULE:
+        if days_remaining <= max_days:
+            return interval
+    return RECHECK_MAX_INTERVAL
+
+class CertificateCache:
+    """SQLite store of check results that decides which hosts are due for a recheck"""
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS certificates (
+                host TEXT NOT NULL,
+                port INTEGER NOT NULL,
+                ip TEXT,
+                status TEXT,
+                common_name TEXT,
+                fingerprint TEXT,
+                not_after TEXT,
+                last_checked TEXT,
+                next_check REAL,
+                error TEXT,
+                PRIMARY KEY (host, port)
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_certificates_next_check ON certificates (next_check)"
+        )
+        self._uncommitted = 0
+
+    def due_hosts(self, hosts, now=None):
+        """Yield the (host, port) pairs that are new or whose next_check has passed"""
+        now = time.time() if now is None else now
+        not_due = set(self.conn.execute(
+            "SELECT host, port FROM certificates WHERE next_check > ?", (now,)
+        ))
+        for host_port in hosts:
+            if host_port not in not_due:
+                yield host_port
+
+    def store(self, result):
+        days_remaining = result.get('days_remaining') if result.get('status') == 'ok' else None
+        # A failed check keeps the last known certificate details
+        self.conn.execute(
+            """INSERT INTO certificates
+               (host, port, ip, status, common_name, fingerprint, not_after,
+                last_checked, next_check, error)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (host, port) DO UPDATE SET
+                   ip = excluded.ip,
+                   status = excluded.status,
+                   common_name = COALESCE(NULLIF(excluded.common_name, ''), common_name),
+                   fingerprint = COALESCE(NULLIF(excluded.fingerprint, ''), fingerprint),
+                   not_after = COALESCE(NULLIF(excluded.not_after, ''), not_after),
+                   last_checked = excluded.last_checked,
+                   next_check = excluded.next_check,
+                   error = excluded.error""",
+            (result['host'], result['port'], result.get('ip', ''), result.get('status'),
+             result.get('common_name', ''), result.get('fingerprint', ''),
+             result.get('not_after', ''), result.get('last_checked', ''),
+             time.time() + recheck_interval(days_remaining), result.get('error', ''))
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def report(self, hosts=None):
+        """
+        Yield cached results, soonest expiry first, with days_remaining recomputed.
+        With `hosts`, only those (host, port) pairs are reported, so hosts removed
+        from the inventory drop out of the report.
+        """
+        now = datetime.utcnow()
+        wanted = set(hosts) if hosts is not None else None
+        rows = self.conn.execute(
+            """SELECT host, port, ip, status, common_name, fingerprint, not_after,
+                      last_checked, error
+               FROM certificates ORDER BY not_after = '', not_after"""
+        )
+        for host, port, ip, status, common_name, fingerprint, not_after, last_checked, error in rows:
+            if wanted is not None and (host, port) not in wanted:
+                continue
+            result = {
+                'host': host, 'port': port, 'ip': ip, 'status': status,
+                'common_name': common_name, 'fingerprint': fingerprint,
+                'not_after': not_after, 'last_checked': last_checked, 'error': error,
+            }
+            if not_after:
+                expires = datetime.fromisoformat(not_after)
+                result['days_remaining'] = (expires - now).days
+                result['is_valid'] = now <= expires
+            yield result
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+def make_result_writer(out, fmt):
+    """Return a callback that streams each result to out as a CSV row or JSON line"""
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        return writer.writerow
+    return lambda result: out.write(json.dumps(result) + "\n")
+
+def run_bulk_scan(args):
+    context = ssl.create_default_context(cafile=args.cafile)
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    cache = CertificateCache(args.cache) if args.cache else None
+    try:
+        write_result = make_result_writer(out, args.format)
+        if args.report:
+            # Serve the fleet report straight from the cache, no handshakes
+            hosts = read_hosts_file(args.hosts_file, args.port) if args.hosts_file else None
+            for result in cache.report(hosts):
+                write_result(result)
+            return
+
+        hosts = read_hosts_file(args.hosts_file, args.port)
+        on_result = write_result
+        if cache:
+            hosts = cache.due_hosts(hosts)
+
+            def on_result(result):
+                cache.store(result)
+                write_result(result)
+
+        asyncio.run(scan_hosts_async(
+            hosts, on_result,
+            concurrency=args.concurrency, per_ip=args.per_ip,
+            timeout=args.timeout, context=context
+        ))
+    finally:
+        if cache:
+            cache.close()
+        if out is not sys.stdout:
+            out.close()
+
 def main():
     parser = argparse.ArgumentParser(
         description="Check SSL certificate expiration dates for a given host",
         epilog="Example: python ssl_checker.py example.com --port 443 --verbose"
     )
-    parser.add_argument("hostname", help="The hostname to check")
+    parser.add_argument("hostname", nargs="?", help="The hostname to check")
     parser.add_argument("--port", type=int, default=443, help="Port number (default: 443)")
     parser.add_argument("--timeout", type=int, default=10, help="Connection timeout in seconds (default: 10)")
     parser.add_argument("--verbose", action="store_true", help="Show detailed certificate information")
+    parser.add_argument("--hosts-file", help="Bulk mode: file with one host or host:port per line")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY,
+                        help=f"Bulk mode: max concurrent checks (default: {BULK_CONCURRENCY})")
+    parser.add_argument("--per-ip", type=int, default=BULK_PER_IP,
+                        help=f"Bulk mode: max concurrent checks per IP (default: {BULK_PER_IP})")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv",
+                        help="Bulk mode: output format (default: csv)")
+    parser.add_argument("--output", help="Bulk mode: write results to this file instead of stdout")
+    parser.add_argument("--cafile", help="CA bundle to trust (e.g. for self-signed test servers)")
+    parser.add_argument("--cache", help="Bulk mode: SQLite result cache; only hosts due for a recheck are scanned")
+    parser.add_argument("--report", action="store_true",
+                        help="Print the fleet report from --cache without scanning "
+                             "(limited to --hosts-file when given)")
     
     args = parser.parse_args()
+
+    if args.report and not args.cache:
+        parser.error("--report requires --cache")
+    if args.hosts_file or args.report:
+        run_bulk_scan(args)
+        return
+    if not args.hostname:
+        parser.error("a hostname or --hosts-file is required")
     
     try:
-        cert_info = get_ssl_certificate_info(args.hostname, args.port, args.timeout)
+        context = ssl.create_default_context(cafile=args.cafile)
+        cert_info = get_ssl_certificate_info(args.hostname, args.port, args.timeout, context)
         print_certificate_info(cert_info, args.verbose)
     except Exception as e:
         print(f"Error: {str(e)}")
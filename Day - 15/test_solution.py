@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from Solution import (RECHECK_ERROR_INTERVAL, RECHECK_MAX_INTERVAL, CertificateCache,
+                      read_hosts_file, recheck_interval, scan_hosts_async)
+
+class LocalTLSServer:
+    """Threaded TLS server on 127.0.0.1 that waits `delay` seconds before each handshake"""
+
+    def __init__(self, certfile, keyfile, delay=0.0):
+        self.delay = delay
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        time.sleep(self.delay)
+        try:
+            with self.context.wrap_socket(conn, server_side=True) as tls:
+                tls.recv(1)  # hold the connection until the client closes it
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+@unittest.skipUnless(shutil.which('openssl'), 'openssl is needed to generate a test certificate')
+class TestBulkScan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.certfile = str(Path(cls.tmp.name) / 'cert.pem')
+        cls.keyfile = str(Path(cls.tmp.name) / 'key.pem')
+        subprocess.run([
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '30',
+            '-keyout', cls.keyfile, '-out', cls.certfile, '-subj', '/CN=localhost',
+            '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+        ], check=True, capture_output=True)
+        cls.context = ssl.create_default_context(cafile=cls.certfile)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def scan(self, hosts, **kwargs):
+        results = []
+        asyncio.run(scan_hosts_async(hosts, results.append, context=self.context, **kwargs))
+        return results
+
+    def test_reports_certificate_details(self):
+        server = LocalTLSServer(self.certfile, self.keyfile)
+        self.addCleanup(server.close)
+
+        [result] = self.scan([('127.0.0.1', server.port)], timeout=5)
+
+        der_cert = ssl.PEM_cert_to_DER_cert(Path(self.certfile).read_text())
+        self.assertEqual(result['status'], 'ok', result.get('error'))
+        self.assertEqual(result['ip'], '127.0.0.1')
+        self.assertEqual(result['common_name'], 'localhost')
+        self.assertEqual(result['fingerprint'], hashlib.sha256(der_cert).hexdigest())
+        self.assertIn(result['days_remaining'], (29, 30))
+        self.assertTrue(result['is_valid'])
+
+    def test_untrusted_certificate_is_an_error(self):
+        server = LocalTLSServer(self.certfile, self.keyfile)
+        self.addCleanup(server.close)
+
+        results = []
+        asyncio.run(scan_hosts_async([('127.0.0.1', server.port)], results.append, timeout=5,
+                                     context=ssl.create_default_context()))
+
+        self.assertEqual(results[0]['status'], 'error')
+        self.assertIn('CERTIFICATE_VERIFY_FAILED', results[0]['error'])
+
+    def test_waiting_for_per_ip_slot_does_not_count_towards_timeout(self):
+        # Each handshake takes 0.3s and only one runs at a time per IP, so the
+        # last of four hosts waits ~0.9s for its slot, longer than the timeout
+        server = LocalTLSServer(self.certfile, self.keyfile, delay=0.3)
+        self.addCleanup(server.close)
+
+        results = self.scan([('127.0.0.1', server.port)] * 4, per_ip=1, timeout=0.6)
+
+        self.assertEqual([r['status'] for r in results], ['ok'] * 4,
+                         [r.get('error') for r in results])
+
+class TestReadHostsFile(unittest.TestCase):
+    def test_host_and_port_forms(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("example.com\n"
+                    "example.org:8443  # comment\n"
+                    "::1\n"
+                    "2001:db8::1\n"
+                    "[2001:db8::2]\n"
+                    "[2001:db8::3]:8443\n"
+                    "\n")
+        self.addCleanup(os.remove, f.name)
+
+        self.assertEqual(list(read_hosts_file(f.name, default_port=443)), [
+            ('example.com', 443),
+            ('example.org', 8443),
+            ('::1', 443),
+            ('2001:db8::1', 443),
+            ('2001:db8::2', 443),
+            ('2001:db8::3', 8443),
+        ])
+
+class TestScanErrors(unittest.TestCase):
+    def test_failing_callback_stops_the_scan(self):
+        # Nothing listens on this port, so every check fails fast
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        def on_result(result):
+            raise BrokenPipeError('output closed')
+
+        async def scan():
+            await asyncio.wait_for(
+                scan_hosts_async([('127.0.0.1', port)] * 50, on_result, concurrency=2, timeout=5), 10)
+
+        with self.assertRaises(BrokenPipeError):
+            asyncio.run(scan())
+
+def check_result(host, days_remaining=None, error='', port=443):
+    """A scan result as produced by fetch_certificate_async"""
+    result = {'host': host, 'port': port, 'ip': '127.0.0.1',
+              'last_checked': datetime.utcnow().isoformat(timespec='seconds')}
+    if error:
+        result.update({'status': 'error', 'error': error})
+    else:
+        result.update({
+            'status': 'ok', 'common_name': host, 'fingerprint': f'fp-{host}',
+            'not_after': (datetime.utcnow() + timedelta(days=days_remaining, hours=1)).isoformat(),
+            'days_remaining': days_remaining, 'is_valid': True, 'error': '',
+        })
+    return result
+
+class TestCertificateCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CertificateCache(':memory:')
+        self.addCleanup(self.cache.close)
+
+    def test_recheck_interval_shrinks_near_expiry(self):
+        intervals = [recheck_interval(days) for days in (365, 60, 20, 5, -3)]
+        self.assertEqual(intervals[0], RECHECK_MAX_INTERVAL)
+        self.assertEqual(intervals, sorted(intervals, reverse=True))
+        self.assertEqual(len(set(intervals)), len(intervals))
+        self.assertEqual(recheck_interval(None), RECHECK_ERROR_INTERVAL)
+
+    def test_skips_hosts_not_yet_due(self):
+        self.cache.store(check_result('far.example', 365))
+        self.cache.store(check_result('near.example', 3))
+        hosts = [('far.example', 443), ('near.example', 443), ('new.example', 443)]
+
+        now = time.time()
+        self.assertEqual(list(self.cache.due_hosts(hosts, now)), [('new.example', 443)])
+        # The host close to expiry comes up for a recheck long before the other one
+        self.assertEqual(list(self.cache.due_hosts(hosts, now + recheck_interval(3) + 1)),
+                         [('near.example', 443), ('new.example', 443)])
+        self.assertEqual(list(self.cache.due_hosts(hosts, now + RECHECK_MAX_INTERVAL + 1)), hosts)
+
+    def test_error_keeps_last_good_certificate(self):
+        good = check_result('a.example', 40)
+        self.cache.store(good)
+        self.cache.store(check_result('a.example', error='timed out after 5 seconds'))
+
+        [row] = self.cache.report()
+        self.assertEqual(row['status'], 'error')
+        self.assertEqual(row['error'], 'timed out after 5 seconds')
+        self.assertEqual(row['fingerprint'], good['fingerprint'])
+        self.assertEqual(row['not_after'], good['not_after'])
+        self.assertEqual(row['days_remaining'], 40)
+        # ... but a failed host is retried soon
+        retry_at = time.time() + RECHECK_ERROR_INTERVAL + 1
+        self.assertEqual(list(self.cache.due_hosts([('a.example', 443)], retry_at)), [('a.example', 443)])
+
+    def test_report_orders_by_expiry_and_filters_to_inventory(self):
+        self.cache.store(check_result('later.example', 200))
+        self.cache.store(check_result('broken.example', error='refused'))
+        self.cache.store(check_result('soon.example', 2))
+        self.cache.store(check_result('removed.example', 1))
+
+        self.assertEqual([row['host'] for row in self.cache.report()],
+                         ['removed.example', 'soon.example', 'later.example', 'broken.example'])
+        inventory = [('soon.example', 443), ('later.example', 443), ('broken.example', 443)]
+        self.assertEqual([row['host'] for row in self.cache.report(inventory)],
+                         ['soon.example', 'later.example', 'broken.example'])
+
+if __name__ == '__main__':
+    unittest.main()
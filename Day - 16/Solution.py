@@ -4,61 +4,218 @@
 # Example Hint: Use requests, Prometheus queries
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
+import argparse
 import json
+import time
+import sys
+import os
+
+try:
+    import numpy as np
+except ImportError:  # Only needed for query_range
+    np = None
 
 # Prometheus API configuration
 PROMETHEUS_URL = "http://127.0.0.1:9090"  # Replace with your Prometheus server URL
 ALERTS_ENDPOINT = "/api/v1/alerts"
 QUERY_ENDPOINT = "/api/v1/query"
+QUERY_RANGE_ENDPOINT = "/api/v1/query_range"
+TIMEOUT = 10  # Request timeout in seconds
+MAX_PARALLEL_QUERIES = 8  # Concurrent queries (and pooled connections) per client
+
+# Range query settings
+RANGE_CHUNK_POINTS = 1000  # Samples per series per chunk request (Prometheus caps at 11000)
+RANGE_CACHE_DIR = ".prometheus_cache"  # On-disk cache of completed chunks (None disables)
+RANGE_CACHE_SETTLE = 5 * 60  # Chunks ending this close to "now" are not cached yet
+
+# Alert grouping defaults
+GROUP_BY_LABELS = ("alertname", "severity")
 
 # Authentication (if needed)
 USERNAME = None  # Set if authentication is required
 PASSWORD = None  # Set if authentication is required
 
+class PrometheusClient:
+    """Prometheus API client that reuses keep-alive connections from one shared session"""
+
+    def __init__(self, base_url=PROMETHEUS_URL, username=USERNAME, password=PASSWORD,
+                 timeout=TIMEOUT, max_workers=MAX_PARALLEL_QUERIES, cache_dir=RANGE_CACHE_DIR):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.session = requests.Session()
+        # Pool as many connections as we run queries in parallel
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if username and password:
+            self.session.auth = HTTPBasicAuth(username, password)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="promql")
+
+    def _get(self, endpoint, params=None):
+        response = self.session.get(f"{self.base_url}{endpoint}", params=params,
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_active_alerts(self):
+        """Fetch all active alerts from Prometheus"""
+        try:
+            data = self._get(ALERTS_ENDPOINT)
+            
+            # Filter for active alerts (state='firing')
+            return [alert for alert in data['data']['alerts']
+                    if alert['state'].lower() == 'firing']
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching alerts: {e}")
+            return None
+
+    def query(self, promql):
+        """Run one instant PromQL query and return its result list"""
+        try:
+            data = self._get(QUERY_ENDPOINT, params={'query': promql})
+            return data['data']['result']
+        except requests.exceptions.RequestException as e:
+            print(f"Error querying {promql}: {e}")
+            return None
+
+    def query_many(self, queries):
+        """Run PromQL queries concurrently; returns {query: result} once all have finished"""
+        queries = list(queries)
+        results = self.executor.map(self.query, queries)
+        return dict(zip(queries, results))
+
+    def _range_chunks(self, start, end, step):
+        """Split [start, end] into chunks aligned to absolute multiples of the chunk span"""
+        span = step * RANGE_CHUNK_POINTS
+        # Aligning to the epoch (not to start) lets overlapping windows share chunks
+        chunk_start = (int(start) // span) * span
+        chunks = []
+        while chunk_start <= end:
+            chunks.append((chunk_start, chunk_start + span - step))
+            chunk_start += span
+        return chunks
+
+    def _chunk_cache_path(self, promql, step, chunk_start):
+        key = hashlib.sha256(f"{self.base_url}|{promql}|{step}|{chunk_start}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _fetch_range_chunk(self, promql, step, chunk):
+        """Fetch one chunk as (labels list, timestamps, values, offsets), using the disk cache"""
+        chunk_start, chunk_end = chunk
+        cacheable = self.cache_dir and chunk_end <= time.time() - RANGE_CACHE_SETTLE
+        cache_path = self._chunk_cache_path(promql, step, chunk_start) if cacheable else None
+        if cache_path and os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                return (json.loads(str(cached['labels'])), cached['timestamps'],
+                        cached['values'], cached['offsets'])
+
+        data = self._get(QUERY_RANGE_ENDPOINT, params={
+            'query': promql, 'start': chunk_start, 'end': chunk_end, 'step': step
+        })
+        labels, timestamps, values, offsets = [], [], [], [0]
+        for series in data['data']['result']:
+            labels.append(series['metric'])
+            samples = series['values']
+            # Convert each series straight into float arrays ("NaN"/"+Inf" parse as floats)
+            timestamps.append(np.fromiter((t for t, _ in samples), dtype=np.float64, count=len(samples)))
+            values.append(np.array([v for _, v in samples], dtype=np.float64))
+            offsets.append(offsets[-1] + len(samples))
+        timestamps = np.concatenate(timestamps) if timestamps else np.empty(0)
+        values = np.concatenate(values) if values else np.empty(0)
+        offsets = np.array(offsets, dtype=np.int64)
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, labels=np.array(json.dumps(labels)),
+                     timestamps=timestamps, values=values, offsets=offsets)
+            os.replace(tmp_path, cache_path)
+        return labels, timestamps, values, offsets
+
+    def query_range(self, promql, start, end, step):
+        """Run a range query in concurrent step-aligned chunks
+
+        start/end are Unix timestamps and step is in seconds. Returns a list of
+        {'metric': labels, 'timestamps': ndarray, 'values': ndarray} per series.
+        """
+        if np is None:
+            raise ImportError("query_range requires numpy (pip install numpy)")
+        step = int(step)
+        start = int(start) // step * step
+        chunks = self._range_chunks(start, end, step)
+        try:
+            fetched = list(self.executor.map(
+                lambda chunk: self._fetch_range_chunk(promql, step, chunk), chunks
+            ))
+        except requests.exceptions.RequestException as e:
+            print(f"Error running range query {promql}: {e}")
+            return None
+
+        # Stitch each series back together across chunks
+        series_parts = {}
+        for labels, timestamps, values, offsets in fetched:
+            for i, metric in enumerate(labels):
+                key = json.dumps(metric, sort_keys=True)
+                part = slice(offsets[i], offsets[i + 1])
+                series_parts.setdefault(key, (metric, [], []))
+                series_parts[key][1].append(timestamps[part])
+                series_parts[key][2].append(values[part])
+
+        results = []
+        for metric, timestamps, values in series_parts.values():
+            timestamps = np.concatenate(timestamps)
+            values = np.concatenate(values)
+            in_window = (timestamps >= start) & (timestamps <= end)
+            results.append({
+                'metric': metric,
+                'timestamps': timestamps[in_window],
+                'values': values[in_window],
+            })
+        return results
+
+    def get_top_alerts_by_metric(self, metric_name, limit=5):
+        """Get top alerts by a specific metric value"""
+        return self.query(f'topk({limit}, {metric_name})')
+
+    def get_top_alerts_by_metrics(self, metric_names, limit=5):
+        """Get top alerts for several metrics in one concurrent round-trip"""
+        queries = {f'topk({limit}, {name})': name for name in metric_names}
+        results = self.query_many(queries)
+        return {queries[query]: result for query, result in results.items()}
+
+    def close(self):
+        self.executor.shutdown()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+_default_client = None
+
+def get_client():
+    """Return the module-wide client, created on first use"""
+    global _default_client
+    if _default_client is None:
+        _default_client = PrometheusClient()
+    return _default_client
+
 def get_active_alerts():
     """Fetch all active alerts from Prometheus"""
-    url = f"{PROMETHEUS_URL}{ALERTS_ENDPOINT}"
-    
-    try:
-        if USERNAME and PASSWORD:
-            response = requests.get(url, auth=HTTPBasicAuth(USERNAME, PASSWORD))
-        else:
-            response = requests.get(url)
-        
-        response.raise_for_status()
-        data = response.json()
-        
-        # Filter for active alerts (state='firing')
-        active_alerts = [alert for alert in data['data']['alerts'] 
-                        if alert['state'].lower() == 'firing']
-        
-        return active_alerts
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching alerts: {e}")
-        return None
+    return get_client().get_active_alerts()
 
 def get_top_alerts_by_metric(metric_name, limit=5):
     """Get top alerts by a specific metric value"""
-    query = f'topk({limit}, {metric_name})'
-    url = f"{PROMETHEUS_URL}{QUERY_ENDPOINT}?query={query}"
-    
-    try:
-        if USERNAME and PASSWORD:
-            response = requests.get(url, auth=HTTPBasicAuth(USERNAME, PASSWORD))
-        else:
-            response = requests.get(url)
-        
-        response.raise_for_status()
-        data = response.json()
-        
-        return data['data']['result']
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error querying metric: {e}")
-        return None
+    return get_client().get_top_alerts_by_metric(metric_name, limit)
 
 def display_alerts(alerts):
     """Display alerts in a readable format"""
@@ -66,23 +223,114 @@ def display_alerts(alerts):
         print("No active alerts found.")
         return
     
-    print(f"\n=== Active Alerts ({len(alerts)}) ===\n")
+    # Build the whole report first and print it once; thousands of print calls are slow
+    lines = [f"\n=== Active Alerts ({len(alerts)}) ===\n"]
     for i, alert in enumerate(alerts, 1):
-        print(f"Alert #{i}:")
-        print(f"  Name:        {alert['labels'].get('alertname', 'N/A')}")
-        print(f"  Severity:    {alert['labels'].get('severity', 'N/A')}")
-        print(f"  State:       {alert['state']}")
-        print(f"  Summary:     {alert['annotations'].get('summary', 'N/A')}")
-        print(f"  Description: {alert['annotations'].get('description', 'N/A')}")
+        lines.append(f"Alert #{i}:")
+        lines.append(f"  Name:        {alert['labels'].get('alertname', 'N/A')}")
+        lines.append(f"  Severity:    {alert['labels'].get('severity', 'N/A')}")
+        lines.append(f"  State:       {alert['state']}")
+        lines.append(f"  Summary:     {alert['annotations'].get('summary', 'N/A')}")
+        lines.append(f"  Description: {alert['annotations'].get('description', 'N/A')}")
         
         # Convert timestamp to readable format
         if 'activeAt' in alert:
             active_at = datetime.strptime(alert['activeAt'], '%Y-%m-%dT%H:%M:%S.%fZ')
-            print(f"  Active Since: {active_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            lines.append(f"  Active Since: {active_at.strftime('%Y-%m-%d %H:%M:%S')}")
         
-        print("\n" + "-"*50 + "\n")
+        lines.append("\n" + "-"*50 + "\n")
+    print("\n".join(lines))
+
+def alert_fingerprint(alert):
+    """Identify an alert by its full label set, like Alertmanager does"""
+    return tuple(sorted(alert['labels'].items()))
+
+class AlertTracker:
+    """Deduplicates alerts by fingerprint, keeps per-group counts and diffs successive polls"""
+
+    def __init__(self, group_by=GROUP_BY_LABELS):
+        self.group_by = tuple(group_by)
+        self.active = {}        # fingerprint -> alert
+        self.group_counts = {}  # group key -> number of active alerts
+
+    def group_key(self, alert):
+        labels = alert['labels']
+        return tuple(labels.get(label, 'N/A') for label in self.group_by)
+
+    def update(self, alerts):
+        """Apply one poll; returns (new_alerts, resolved_alerts)
+
+        Duplicate alerts in a poll collapse onto one fingerprint. Group counts
+        and the returned lists are only touched for alerts that changed.
+        /api/v1/alerts always returns every firing alert, so fingerprinting the
+        poll is still O(total); only a push source (e.g. an Alertmanager
+        webhook) could make the whole update O(changed).
+        """
+        current = {alert_fingerprint(alert): alert for alert in alerts}
+        new = [current[fp] for fp in current.keys() - self.active.keys()]
+        resolved = [self.active[fp] for fp in self.active.keys() - current.keys()]
+
+        for alert in new:
+            key = self.group_key(alert)
+            self.group_counts[key] = self.group_counts.get(key, 0) + 1
+        for alert in resolved:
+            key = self.group_key(alert)
+            self.group_counts[key] -= 1
+            if not self.group_counts[key]:
+                del self.group_counts[key]
+
+        self.active = current
+        return new, resolved
+
+def group_alerts(alerts, group_by=GROUP_BY_LABELS):
+    """Group alerts by the given labels; returns {group key: [alerts]}"""
+    groups = {}
+    for alert in alerts:
+        key = tuple(alert['labels'].get(label, 'N/A') for label in group_by)
+        groups.setdefault(key, []).append(alert)
+    return groups
+
+def display_alert_changes(tracker, new, resolved, out=sys.stdout):
+    """Print only what changed since the last poll, grouped, in a single write"""
+    if not new and not resolved:
+        return
+    lines = [f"\n=== {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: "
+             f"{len(new)} new, {len(resolved)} resolved, {len(tracker.active)} firing ==="]
+    for title, alerts in (("NEW", new), ("RESOLVED", resolved)):
+        for key, grouped in group_alerts(alerts, tracker.group_by).items():
+            group = ", ".join(f"{label}={value}" for label, value in zip(tracker.group_by, key))
+            lines.append(f"[{title}] {group} ({len(grouped)} alert(s), "
+                         f"{tracker.group_counts.get(key, 0)} firing in group)")
+    out.write("\n".join(lines) + "\n")
+    out.flush()
+
+def watch_alerts(interval, group_by=GROUP_BY_LABELS):
+    """Poll Prometheus and report only new and resolved alerts"""
+    client = get_client()
+    tracker = AlertTracker(group_by)
+    try:
+        while True:
+            alerts = client.get_active_alerts()
+            if alerts is not None:
+                new, resolved = tracker.update(alerts)
+                display_alert_changes(tracker, new, resolved)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching alerts.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Fetch active alerts from Prometheus")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Keep polling and print only new/resolved alerts")
+    parser.add_argument("--group-by", default=",".join(GROUP_BY_LABELS),
+                        help="Comma-separated labels used to group alerts (default: alertname,severity)")
+    args = parser.parse_args()
+
+    if args.watch:
+        print(f"Watching alerts on {PROMETHEUS_URL} every {args.watch}s...")
+        watch_alerts(args.watch, [label.strip() for label in args.group_by.split(",") if label.strip()])
+        return
+
     print("Fetching active alerts from Prometheus...")
     
     # Option 1: Get all active alerts
@@ -95,5 +343,10 @@ def main():
     # print(f"Top alerts by {metric_name}:")
     # print(json.dumps(top_alerts, indent=2))
 
+    # Option 3: Query several metrics concurrently over pooled connections
+    # metric_names = ["node_cpu_seconds_total", "node_memory_MemAvailable_bytes"]
+    # top_by_metric = get_client().get_top_alerts_by_metrics(metric_names)
+    # print(json.dumps(top_by_metric, indent=2))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,165 @@
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from Solution import (RANGE_CHUNK_POINTS, AlertTracker, PrometheusClient, alert_fingerprint,
+                      display_alert_changes, np)
+
+class StubPrometheus:
+    """In-process fake Prometheus that records requests and client connections"""
+
+    def __init__(self, alerts=()):
+        self.alerts = list(alerts)
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path, params):
+        if path == '/api/v1/alerts':
+            return {'status': 'success', 'data': {'alerts': self.alerts}}
+        if path == '/api/v1/query':
+            time.sleep(0.05)  # long enough for concurrent queries to overlap
+            return {'status': 'success', 'data': {'result': [{'metric': {'query': params['query']}}]}}
+        if path == '/api/v1/query_range':
+            # Two series, each with value == timestamp at every step of the chunk
+            start, end, step = (int(params[name]) for name in ('start', 'end', 'step'))
+            samples = [[t, str(t)] for t in range(start, end + 1, step)]
+            return {'status': 'success', 'data': {'result': [
+                {'metric': {'instance': name}, 'values': samples} for name in ('a', 'b')
+            ]}}
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with stub.lock:
+                    stub.requests.append((url.path, params))
+                    stub.connections.add(self.client_address)
+                body = stub.handle(url.path, params)
+                data = json.dumps(body).encode()
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def request_count(self, path):
+        with self.lock:
+            return sum(1 for p, _ in self.requests if p == path)
+
+def make_alert(name, severity='critical', instance='host-1', state='firing'):
+    return {'labels': {'alertname': name, 'severity': severity, 'instance': instance},
+            'annotations': {'summary': f'{name} on {instance}'}, 'state': state}
+
+class TestPrometheusClient(unittest.TestCase):
+    def setUp(self):
+        self.prometheus = StubPrometheus(alerts=[make_alert('HighCPU'), make_alert('Old', state='pending')])
+        self.addCleanup(self.prometheus.stop)
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        self.client = PrometheusClient(self.prometheus.url, max_workers=4, cache_dir=cache.name)
+        self.addCleanup(self.client.close)
+
+    def test_active_alerts_are_firing_only(self):
+        alerts = self.client.get_active_alerts()
+        self.assertEqual([alert['labels']['alertname'] for alert in alerts], ['HighCPU'])
+
+    def test_query_many_runs_concurrently_on_pooled_connections(self):
+        queries = [f'topk(5, metric_{i})' for i in range(16)]
+        started = time.monotonic()
+        results = self.client.query_many(queries)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(list(results), queries)
+        self.assertTrue(all(results[q][0]['metric']['query'] == q for q in queries))
+        self.assertLess(elapsed, 16 * 0.05)  # not one after the other
+        # Keep-alive: never more connections than workers
+        self.assertLessEqual(len(self.prometheus.connections), 4)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_query_range_stitches_chunks_and_caches_settled_ones(self):
+        step = 15
+        span = step * RANGE_CHUNK_POINTS
+        # Three aligned chunks, all of them long settled
+        start = (int(time.time()) - 2 * 24 * 3600) // span * span
+        end = start + 2 * span + 10 * step
+
+        first = self.client.query_range('up', start, end, step)
+        requests_after_first = self.prometheus.request_count('/api/v1/query_range')
+        second = self.client.query_range('up', start, end, step)
+
+        self.assertEqual(sorted(series['metric']['instance'] for series in first), ['a', 'b'])
+        for series in first:
+            expected = np.arange(start, end + 1, step, dtype=np.float64)
+            np.testing.assert_array_equal(series['timestamps'], expected)
+            np.testing.assert_array_equal(series['values'], expected)
+        self.assertEqual(requests_after_first, 3)
+        # All chunks ended more than RANGE_CACHE_SETTLE ago, so they come from disk
+        self.assertEqual(self.prometheus.request_count('/api/v1/query_range'), 3)
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a['values'], b['values'])
+
+    def test_range_chunks_are_aligned_to_the_epoch(self):
+        step = 60
+        span = step * RANGE_CHUNK_POINTS
+        chunks = self.client._range_chunks(span + 120, 2 * span + 60, step)
+
+        self.assertEqual(chunks, [(span, 2 * span - step), (2 * span, 3 * span - step)])
+
+class TestAlertTracker(unittest.TestCase):
+    def test_reports_only_new_and_resolved_alerts(self):
+        tracker = AlertTracker()
+        cpu1, cpu2, disk = make_alert('HighCPU'), make_alert('HighCPU', instance='host-2'), make_alert('DiskFull')
+
+        new, resolved = tracker.update([cpu1, cpu1, disk])  # duplicates collapse
+        self.assertEqual(sorted(a['labels']['alertname'] for a in new), ['DiskFull', 'HighCPU'])
+        self.assertEqual(resolved, [])
+        self.assertEqual(tracker.group_counts, {('HighCPU', 'critical'): 1, ('DiskFull', 'critical'): 1})
+
+        self.assertEqual(tracker.update([cpu1, disk]), ([], []))
+
+        new, resolved = tracker.update([cpu1, cpu2])
+        self.assertEqual(new, [cpu2])
+        self.assertEqual(resolved, [disk])
+        self.assertEqual(tracker.group_counts, {('HighCPU', 'critical'): 2})
+        self.assertEqual(set(tracker.active), {alert_fingerprint(cpu1), alert_fingerprint(cpu2)})
+
+    def test_changes_are_printed_grouped(self):
+        tracker = AlertTracker(group_by=['alertname'])
+        alerts = [make_alert('HighCPU', instance=f'host-{i}') for i in range(50)]
+        new, resolved = tracker.update(alerts)
+        out = io.StringIO()
+        display_alert_changes(tracker, new, resolved, out=out)
+        display_alert_changes(tracker, [], [], out=out)  # nothing changed: nothing printed
+
+        lines = out.getvalue().strip().splitlines()
+        self.assertIn('50 new, 0 resolved, 50 firing', lines[0])
+        self.assertEqual(lines[1], '[NEW] alertname=HighCPU (50 alert(s), 50 firing in group)')
+        self.assertEqual(len(lines), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# Minimal ASGI entry point backed by AsyncJenkinsService.
+# Serves /, /health, /trigger-job/<job_name> and /trigger-jobs without a thread
+# per request. The /queue build-status routes are only served by the Flask app:
+#
+#     uvicorn app.asgi:app --workers 4
+import asyncio
+import json
+from app.config import Config
+from app.services.async_jenkins_service import AsyncJenkinsService
+from app.services.jenkins_service import parse_batch_jobs, batch_result
+from app.utils.auth import authenticate
+from app.utils.rate_limit import (
+    TriggerRateLimiter, rate_limited_result, split_rate_limited_jobs, merge_batch_results
+)
+
+TRIGGER_PREFIX = '/trigger-job/'
+BATCH_TRIGGER_PATH = '/trigger-jobs'
+
+jenkins_service = None
+rate_limiter = TriggerRateLimiter()
+
+async def limit(check, *args):
+    """Run a rate-limit check without blocking the event loop on a Redis round trip"""
+    if rate_limiter.blocking:
+        return await asyncio.to_thread(check, *args)
+    return check(*args)
+
+def get_jenkins_service():
+    global jenkins_service
+    if jenkins_service is None:
+        jenkins_service = AsyncJenkinsService()
+    return jenkins_service
+
+async def read_json_body(receive, default=None):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    if not body:
+        return default
+    try:
+        return json.loads(body)
+    except ValueError:
+        return default
+
+async def send_response(send, status, payload, extra_headers=()):
+    if isinstance(payload, str):
+        body, content_type = payload.encode('utf-8'), b'text/html; charset=utf-8'
+    else:
+        body, content_type = json.dumps(payload).encode('utf-8'), b'application/json'
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type),
+                    (b'content-length', str(len(body)).encode()), *extra_headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_jenkins_service()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if jenkins_service is not None:
+                await jenkins_service.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def too_many_requests(send, message, retry_after):
+    headers = [(b'retry-after', str(retry_after).encode())] if retry_after else []
+    await send_response(send, 429, rate_limited_result(message, retry_after), headers)
+
+async def trigger_job(username, job_name, receive, send):
+    allowed, retry_after = await limit(rate_limiter.check_client, username)
+    if not allowed:
+        await too_many_requests(send, 'Too many trigger requests from this client', retry_after)
+        return
+    allowed, retry_after = await limit(rate_limiter.check_job, job_name)
+    if not allowed:
+        await too_many_requests(send, f'Job {job_name} is being triggered too often', retry_after)
+        return
+    parameters = await read_json_body(receive) or {}
+    result = await get_jenkins_service().trigger_job(job_name, parameters)
+    default_status = 500 if result['status'] == 'error' else 200
+    await send_response(send, result.get('status_code', default_status), result)
+
+async def trigger_jobs(username, receive, send):
+    try:
+        jobs = parse_batch_jobs(await read_json_body(receive), Config.JENKINS_MAX_BATCH_SIZE)
+    except ValueError as e:
+        await send_response(send, 400, {'status': 'error', 'message': str(e)})
+        return
+    allowed, retry_after = await limit(rate_limiter.check_client, username, len(jobs))
+    if not allowed:
+        await too_many_requests(send, 'Too many trigger requests from this client', retry_after)
+        return
+    allowed_jobs, results = await limit(split_rate_limited_jobs, rate_limiter, jobs)
+    triggered = await get_jenkins_service().trigger_jobs(allowed_jobs) if allowed_jobs else []
+    response, status_code = batch_result(merge_batch_results(results, triggered))
+    await send_response(send, status_code, response)
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'], scope['method']
+    if path == '/' and method == 'GET':
+        await send_response(send, 200, 'Jenkins Trigger API is running.')
+    elif path == '/health' and method == 'GET':
+        await send_response(send, 200, {'status': 'healthy'})
+    elif (path.startswith(TRIGGER_PREFIX) or path == BATCH_TRIGGER_PATH) and method == 'POST':
+        headers = dict(scope['headers'])
+        username = authenticate(headers.get(b'authorization', b'').decode('latin-1'))
+        if username is None:
+            await send_response(send, 401, {
+                'status': 'error',
+                'message': 'Basic authentication required'
+            })
+            return
+        if path == BATCH_TRIGGER_PATH:
+            await trigger_jobs(username, receive, send)
+        else:
+            await trigger_job(username, path[len(TRIGGER_PREFIX):], receive, send)
+    else:
+        await send_response(send, 404, {'status': 'error', 'message': 'Not found'})
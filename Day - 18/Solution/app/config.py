@@ -10,3 +10,32 @@ class Config:
     FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key')
     BASIC_AUTH_USERNAME = os.getenv('BASIC_AUTH_USERNAME', 'admin')
     BASIC_AUTH_PASSWORD = os.getenv('BASIC_AUTH_PASSWORD', 'password')
+
+    # Jenkins HTTP client tuning
+    JENKINS_POOL_SIZE = int(os.getenv('JENKINS_POOL_SIZE', '20'))
+    JENKINS_CONNECT_TIMEOUT = float(os.getenv('JENKINS_CONNECT_TIMEOUT', '3.05'))
+    JENKINS_READ_TIMEOUT = float(os.getenv('JENKINS_READ_TIMEOUT', '10'))
+
+    # Job-existence cache
+    JENKINS_JOB_CACHE_TTL = float(os.getenv('JENKINS_JOB_CACHE_TTL', '300'))
+    JENKINS_JOB_NEGATIVE_TTL = float(os.getenv('JENKINS_JOB_NEGATIVE_TTL', '30'))
+
+    # Batch triggers
+    JENKINS_BATCH_PARALLELISM = int(os.getenv('JENKINS_BATCH_PARALLELISM', '10'))
+    JENKINS_MAX_BATCH_SIZE = int(os.getenv('JENKINS_MAX_BATCH_SIZE', '100'))
+
+    # Build tracking / long-poll
+    BUILD_POLL_MIN_INTERVAL = float(os.getenv('BUILD_POLL_MIN_INTERVAL', '1'))
+    BUILD_POLL_MAX_INTERVAL = float(os.getenv('BUILD_POLL_MAX_INTERVAL', '15'))
+    BUILD_TRACK_RETENTION = float(os.getenv('BUILD_TRACK_RETENTION', '600'))
+    LONG_POLL_MAX_TIMEOUT = float(os.getenv('LONG_POLL_MAX_TIMEOUT', '60'))
+
+    # Auth cache and rate limiting
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '256'))
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # memory or redis
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+    RATE_LIMIT_CLIENT_RATE = float(os.getenv('RATE_LIMIT_CLIENT_RATE', '5'))  # tokens per second
+    RATE_LIMIT_CLIENT_BURST = float(os.getenv('RATE_LIMIT_CLIENT_BURST', '100'))  # >= JENKINS_MAX_BATCH_SIZE
+    RATE_LIMIT_JOB_RATE = float(os.getenv('RATE_LIMIT_JOB_RATE', '1'))
+    RATE_LIMIT_JOB_BURST = float(os.getenv('RATE_LIMIT_JOB_BURST', '10'))
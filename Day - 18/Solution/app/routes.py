@@ -1,9 +1,25 @@
-from flask import Blueprint, request, jsonify
-from app.services.jenkins_service import JenkinsService
+import json
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+from app.config import Config
+from app.services.build_tracker import BuildTracker, TERMINAL_STATES
+from app.services.jenkins_service import JenkinsService, parse_batch_jobs, batch_result
 from app.utils.auth import basic_auth_required
+from app.utils.rate_limit import (
+    TriggerRateLimiter, rate_limited_result, split_rate_limited_jobs, merge_batch_results
+)
 
 api = Blueprint('api', __name__)
 jenkins_service = JenkinsService()
+build_tracker = BuildTracker(jenkins_service)
+rate_limiter = TriggerRateLimiter()
+
+SSE_HEARTBEAT = 15  # Seconds between keep-alive comments on idle event streams
+
+def too_many_requests(message, retry_after):
+    response = jsonify(rate_limited_result(message, retry_after))
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response, 429
 
 @api.route('/', methods=['GET'])
 def index():
@@ -36,9 +52,18 @@ def trigger_job(job_name):
         description: Unauthorized
       404:
         description: Job not found
+      429:
+        description: Rate limit exceeded for this client or job
       500:
         description: Internal server error
     """
+    allowed, retry_after = rate_limiter.check_client(g.auth_username)
+    if not allowed:
+        return too_many_requests('Too many trigger requests from this client', retry_after)
+    allowed, retry_after = rate_limiter.check_job(job_name)
+    if not allowed:
+        return too_many_requests(f'Job {job_name} is being triggered too often', retry_after)
+
     parameters = request.get_json() or {}
 
     result = jenkins_service.trigger_job(job_name, parameters)
@@ -48,6 +73,119 @@ def trigger_job(job_name):
 
     return jsonify(result), result.get('status_code', 200)
 
+@api.route('/trigger-jobs', methods=['POST'])
+@basic_auth_required
+def trigger_jobs():
+    """
+    Trigger several Jenkins jobs concurrently
+    ---
+    parameters:
+      - name: jobs
+        in: body
+        schema:
+          type: object
+          properties:
+            jobs:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                  parameters:
+                    type: object
+    responses:
+      200:
+        description: All jobs triggered successfully
+      207:
+        description: Some or all jobs failed; see per-job results
+      400:
+        description: Invalid request body
+      401:
+        description: Unauthorized
+      429:
+        description: Rate limit exceeded for this client
+    """
+    try:
+        jobs = parse_batch_jobs(request.get_json(silent=True), Config.JENKINS_MAX_BATCH_SIZE)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    # Each job in the batch costs one token from the client's bucket
+    allowed, retry_after = rate_limiter.check_client(g.auth_username, cost=len(jobs))
+    if not allowed:
+        return too_many_requests('Too many trigger requests from this client', retry_after)
+
+    allowed_jobs, results = split_rate_limited_jobs(rate_limiter, jobs)
+    triggered = jenkins_service.trigger_jobs(allowed_jobs) if allowed_jobs else []
+    response, status_code = batch_result(merge_batch_results(results, triggered))
+    return jsonify(response), status_code
+
+@api.route('/queue/<int:queue_id>', methods=['GET'])
+@basic_auth_required
+def queue_status(queue_id):
+    """
+    Long-poll the status of a triggered build
+    ---
+    parameters:
+      - name: queue_id
+        in: path
+        type: integer
+        required: true
+      - name: since
+        in: query
+        type: integer
+        description: Return as soon as the status version is greater than this
+      - name: timeout
+        in: query
+        type: number
+        description: Seconds to wait for a change (capped by LONG_POLL_MAX_TIMEOUT)
+    responses:
+      200:
+        description: Current status (state, build_number, build_url, result, version)
+      401:
+        description: Unauthorized
+    """
+    since = request.args.get('since', 0, type=int)
+    timeout = min(request.args.get('timeout', 0, type=float), Config.LONG_POLL_MAX_TIMEOUT)
+    if timeout > 0:
+        status = build_tracker.wait_for_change(queue_id, since, timeout)
+    else:
+        status = build_tracker.track(queue_id)
+    return jsonify(status), 200
+
+@api.route('/queue/<int:queue_id>/events', methods=['GET'])
+@basic_auth_required
+def queue_events(queue_id):
+    """
+    Server-sent events stream of a triggered build's status changes
+    ---
+    parameters:
+      - name: queue_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: text/event-stream of status objects, closed once the build finishes
+      401:
+        description: Unauthorized
+    """
+    def events():
+        version = -1
+        while True:
+            status = build_tracker.wait_for_change(queue_id, version, SSE_HEARTBEAT)
+            if status['version'] == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = status['version']
+            yield f"event: status\ndata: {json.dumps(status)}\n\n"
+            if status['state'] in TERMINAL_STATES:
+                return
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 @api.route('/health', methods=['GET'])
 def health_check():
     """
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import httpx
+from app.config import Config
+from app.services.job_cache import JobCache, job_names_from_response
+from app.services.jenkins_service import (
+    JOB_LIST_PARAMS, JOB_CHECK_PARAMS, build_trigger_request, job_not_found_result,
+    trigger_result, connection_error_result, job_refresh_interval
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncJenkinsService:
+    """asyncio counterpart of JenkinsService, built on a pooled httpx.AsyncClient"""
+
+    def __init__(self, jenkins_url=None, pool_size=None, connect_timeout=None, read_timeout=None,
+                 job_cache_ttl=None, job_negative_ttl=None):
+        self.jenkins_url = jenkins_url or Config.JENKINS_URL
+        pool_size = pool_size or Config.JENKINS_POOL_SIZE
+        self.client = httpx.AsyncClient(
+            auth=(Config.JENKINS_USERNAME or '', Config.JENKINS_API_TOKEN or ''),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout or Config.JENKINS_READ_TIMEOUT,
+                                  connect=connect_timeout or Config.JENKINS_CONNECT_TIMEOUT),
+        )
+        self.job_cache = JobCache(job_cache_ttl or Config.JENKINS_JOB_CACHE_TTL,
+                                  job_negative_ttl or Config.JENKINS_JOB_NEGATIVE_TTL)
+        self._refresher = None
+
+    async def refresh_jobs(self):
+        """Reload the whole job list with a single Jenkins call"""
+        response = await self.client.get(f"{self.jenkins_url}/api/json", params=JOB_LIST_PARAMS)
+        response.raise_for_status()
+        self.job_cache.replace_jobs(job_names_from_response(response.json()))
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_jobs()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"Could not refresh Jenkins job list: {str(e)}")
+            await asyncio.sleep(job_refresh_interval(self.job_cache))
+
+    def start_job_refresher(self):
+        """Start the background job-list refresher on the running loop (idempotent)"""
+        if self._refresher is None:
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def job_exists(self, job_name):
+        """Same contract as JenkinsService.job_exists: (exists, status_code)"""
+        known = self.job_cache.lookup(job_name)
+        if known is not None:
+            return known, 200 if known else 404
+
+        response = await self.client.get(f"{self.jenkins_url}/job/{job_name}/api/json",
+                                         params=JOB_CHECK_PARAMS)
+        if response.status_code == 200:
+            self.job_cache.add(job_name)
+        elif response.status_code == 404:
+            self.job_cache.mark_missing(job_name)
+        return response.status_code == 200, response.status_code
+
+    async def trigger_job(self, job_name, parameters=None):
+        """Trigger a Jenkins job; returns the same result dict as JenkinsService.trigger_job"""
+        self.start_job_refresher()
+        try:
+            exists, status_code = await self.job_exists(job_name)
+            if not exists:
+                return job_not_found_result(job_name, status_code)
+
+            build_url, params = build_trigger_request(self.jenkins_url, job_name, parameters)
+            response = await self.client.post(build_url, params=params)
+            if response.status_code == 404:
+                self.job_cache.mark_missing(job_name)
+                return job_not_found_result(job_name, response.status_code)
+            return trigger_result(job_name, response.status_code, response.headers)
+
+        except httpx.HTTPError as e:
+            return connection_error_result(e)
+
+    async def trigger_jobs(self, jobs, max_parallel=None):
+        """Async counterpart of JenkinsService.trigger_jobs"""
+        semaphore = asyncio.Semaphore(max_parallel or Config.JENKINS_BATCH_PARALLELISM)
+
+        async def trigger(job_name, parameters):
+            async with semaphore:
+                return {'job': job_name, **await self.trigger_job(job_name, parameters)}
+
+        return list(await asyncio.gather(*(trigger(name, params) for name, params in jobs)))
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+        await self.client.aclose()
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+import requests
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+EXPIRED = 'expired'
+TERMINAL_STATES = (FINISHED, CANCELLED, EXPIRED)
+
+class BuildTracker:
+    """
+    Follows triggered queue items to their builds with one shared poller thread.
+
+    Every watched queue item is polled by the same background thread, so
+    Jenkins load depends on the number of tracked builds, not on how many
+    clients are waiting. Each item backs off from BUILD_POLL_MIN_INTERVAL to
+    BUILD_POLL_MAX_INTERVAL while nothing changes and resets on every change.
+    """
+
+    def __init__(self, jenkins_service, min_interval=None, max_interval=None, retention=None,
+                 clock=time.monotonic):
+        self.jenkins_service = jenkins_service
+        self.min_interval = min_interval or Config.BUILD_POLL_MIN_INTERVAL
+        self.max_interval = max_interval or Config.BUILD_POLL_MAX_INTERVAL
+        self.retention = retention or Config.BUILD_TRACK_RETENTION
+        self.clock = clock
+        self._items = {}      # queue_id -> status dict
+        self._schedule = {}   # queue_id -> (next poll time, current interval)
+        self._finished_at = {}  # queue_id -> clock time it reached a terminal state
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def track(self, queue_id):
+        """Start following a queue item (idempotent); returns its current status"""
+        with self._cond:
+            if queue_id not in self._items:
+                self._items[queue_id] = {
+                    'queue_id': queue_id,
+                    'state': QUEUED,
+                    'build_number': None,
+                    'build_url': None,
+                    'result': None,
+                    'version': 0,
+                }
+                self._schedule[queue_id] = (self.clock(), self.min_interval)
+                self._cond.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop,
+                                                name='jenkins-build-tracker', daemon=True)
+                self._thread.start()
+            return dict(self._items[queue_id])
+
+    def wait_for_change(self, queue_id, since_version=0, timeout=30):
+        """Block until the item's version passes since_version or timeout; returns its status"""
+        deadline = self.clock() + timeout
+        with self._cond:
+            self.track(queue_id)
+            while True:
+                status = self._items[queue_id]
+                remaining = deadline - self.clock()
+                if status['version'] > since_version or status['state'] in TERMINAL_STATES \
+                        or remaining <= 0:
+                    return dict(status)
+                self._cond.wait(remaining)
+
+    def _poll_loop(self):
+        while True:
+            with self._cond:
+                now = self.clock()
+                self._expire_finished(now)
+                due = [queue_id for queue_id, (next_poll, _) in self._schedule.items()
+                       if next_poll <= now]
+                if not due:
+                    next_poll = min((at for at, _ in self._schedule.values()), default=None)
+                    self._cond.wait(None if next_poll is None else next_poll - now)
+                    continue
+                snapshots = {queue_id: dict(self._items[queue_id]) for queue_id in due}
+
+            # Jenkins calls happen outside the lock so waiters are never blocked on I/O
+            for queue_id, status in snapshots.items():
+                try:
+                    changes = self._poll_item(status)
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.warning(f"Could not poll queue item {queue_id}: {str(e)}")
+                    changes = None
+                except Exception:
+                    # Never let one bad item kill the poller shared by every waiter
+                    logger.exception(f"Unexpected error polling queue item {queue_id}")
+                    changes = None
+                self._apply(queue_id, changes)
+
+    def _poll_item(self, status):
+        """Return the changed fields for one item, or None if nothing changed"""
+        if status['state'] == QUEUED:
+            item = self.jenkins_service.get_queue_item(status['queue_id'])
+            if item is None:
+                return {'state': EXPIRED}
+            if item.get('cancelled'):
+                return {'state': CANCELLED}
+            executable = item.get('executable')
+            if not executable or not executable.get('url'):
+                # Stay queued until Jenkins reports where the build lives
+                return None
+            status = {'state': RUNNING, 'build_number': executable.get('number'),
+                      'build_url': executable.get('url')}
+            # Check the build right away; short builds may already be done
+            build = self.jenkins_service.get_build(status['build_url'])
+            if not build.get('building') and build.get('result'):
+                status.update({'state': FINISHED, 'result': build['result']})
+            return status
+
+        build = self.jenkins_service.get_build(status['build_url'])
+        if build.get('building') or not build.get('result'):
+            return None
+        return {'state': FINISHED, 'result': build['result']}
+
+    def _apply(self, queue_id, changes):
+        with self._cond:
+            if queue_id not in self._items:
+                return
+            now = self.clock()
+            if changes:
+                status = self._items[queue_id]
+                status.update(changes)
+                status['version'] += 1
+                status['updated_at'] = time.time()
+                if status['state'] in TERMINAL_STATES:
+                    # Keep the final status around for late waiters, but stop polling
+                    self._schedule.pop(queue_id, None)
+                    self._finished_at[queue_id] = now
+                else:
+                    self._schedule[queue_id] = (now + self.min_interval, self.min_interval)
+                self._cond.notify_all()
+            elif queue_id in self._schedule:
+                _, interval = self._schedule[queue_id]
+                interval = min(interval * 2, self.max_interval)
+                self._schedule[queue_id] = (now + interval, interval)
+
+    def _expire_finished(self, now):
+        expired = [queue_id for queue_id, finished_at in self._finished_at.items()
+                   if now - finished_at > self.retention]
+        for queue_id in expired:
+            del self._items[queue_id]
+            del self._finished_at[queue_id]
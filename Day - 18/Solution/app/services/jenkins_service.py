@@ -1,14 +1,177 @@
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from app.config import Config
+from app.services.job_cache import JobCache, job_names_from_response
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
+JOB_LIST_PARAMS = {'tree': 'jobs[name]'}
+JOB_CHECK_PARAMS = {'tree': 'name'}
+BUILD_STATUS_PARAMS = {'tree': 'number,url,building,result,duration'}
+
+def queue_id_from_location(queue_location):
+    """Extract the queue item id from a Location like .../queue/item/123/"""
+    match = re.search(r'/queue/item/(\d+)', queue_location or '')
+    return int(match.group(1)) if match else None
+
+def build_trigger_request(jenkins_url, job_name, parameters=None):
+    """Return the (url, params) pair used to trigger a job"""
+    # Build URL depends on whether we have parameters or not
+    if parameters:
+        return f"{jenkins_url}/job/{job_name}/buildWithParameters", parameters
+    return f"{jenkins_url}/job/{job_name}/build", None
+
+def job_not_found_result(job_name, status_code):
+    return {
+        'status': 'error',
+        'message': f'Job {job_name} not found or access denied',
+        'status_code': status_code
+    }
+
+def trigger_result(job_name, status_code, headers):
+    """Turn Jenkins' response to a build request into the API result dict"""
+    if status_code in [200, 201]:
+        queue_location = headers.get('Location')
+        return {
+            'status': 'success',
+            'message': f'Job {job_name} triggered successfully',
+            'queue_location': queue_location,
+            'queue_id': queue_id_from_location(queue_location),
+            'status_code': status_code
+        }
+    logger.error(f"Failed to trigger job {job_name}. Status code: {status_code}")
+    return {
+        'status': 'error',
+        'message': f'Failed to trigger job {job_name}',
+        'status_code': status_code
+    }
+
+def connection_error_result(error):
+    logger.error(f"Error triggering Jenkins job: {str(error)}")
+    return {
+        'status': 'error',
+        'message': f'Error connecting to Jenkins: {str(error)}',
+        'status_code': 500
+    }
+
+def parse_batch_jobs(payload, max_size):
+    """
+    Validate a batch trigger body: {"jobs": [{"name": ..., "parameters": {...}}, ...]}
+
+    Returns:
+        list: (job_name, parameters) tuples
+
+    Raises:
+        ValueError: If the body is malformed or the batch is too large
+    """
+    jobs = payload.get('jobs') if isinstance(payload, dict) else None
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError("Request body must contain a non-empty 'jobs' list")
+    if len(jobs) > max_size:
+        raise ValueError(f"At most {max_size} jobs can be triggered per batch")
+
+    parsed = []
+    for job in jobs:
+        if isinstance(job, str):
+            job = {'name': job}
+        if not isinstance(job, dict) or not isinstance(job.get('name'), str) or not job['name']:
+            raise ValueError("Each job must be a name or an object with a 'name'")
+        parameters = job.get('parameters') or {}
+        if not isinstance(parameters, dict):
+            raise ValueError(f"Parameters for job {job['name']} must be an object")
+        parsed.append((job['name'], parameters))
+    return parsed
+
+def batch_result(results):
+    """Summarise per-job results into the batch response and its HTTP status"""
+    failed = sum(1 for result in results if result['status'] != 'success')
+    if not failed:
+        status, status_code = 'success', 200
+    elif failed < len(results):
+        status, status_code = 'partial', 207
+    else:
+        status, status_code = 'error', 207
+    return {
+        'status': status,
+        'triggered': len(results) - failed,
+        'failed': failed,
+        'results': results
+    }, status_code
+
+def job_refresh_interval(job_cache):
+    # Refresh well before entries expire so lookups never wait on Jenkins
+    return max(job_cache.ttl / 2, 1)
+
 class JenkinsService:
-    def __init__(self):
-        self.jenkins_url = Config.JENKINS_URL
+    def __init__(self, jenkins_url=None, pool_size=None, connect_timeout=None, read_timeout=None,
+                 job_cache_ttl=None, job_negative_ttl=None):
+        self.jenkins_url = jenkins_url or Config.JENKINS_URL
         self.auth = HTTPBasicAuth(Config.JENKINS_USERNAME, Config.JENKINS_API_TOKEN)
+        self.timeout = (connect_timeout or Config.JENKINS_CONNECT_TIMEOUT,
+                        read_timeout or Config.JENKINS_READ_TIMEOUT)
+
+        # One keep-alive session shared by all requests handled by this process
+        pool_size = pool_size or Config.JENKINS_POOL_SIZE
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.job_cache = JobCache(job_cache_ttl or Config.JENKINS_JOB_CACHE_TTL,
+                                  job_negative_ttl or Config.JENKINS_JOB_NEGATIVE_TTL)
+        self._refresher = None
+        self._refresher_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
+
+    def refresh_jobs(self):
+        """Reload the whole job list with a single Jenkins call"""
+        response = self.session.get(f"{self.jenkins_url}/api/json", params=JOB_LIST_PARAMS,
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        self.job_cache.replace_jobs(job_names_from_response(response.json()))
+
+    def _refresh_loop(self):
+        while not self._stop_refresh.is_set():
+            try:
+                self.refresh_jobs()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning(f"Could not refresh Jenkins job list: {str(e)}")
+            self._stop_refresh.wait(job_refresh_interval(self.job_cache))
+
+    def start_job_refresher(self):
+        """Start the background job-list refresher (idempotent)"""
+        # Request threads call this concurrently; only one of them may start the thread
+        with self._refresher_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop,
+                                                   name='jenkins-job-refresh', daemon=True)
+                self._refresher.start()
+
+    def job_exists(self, job_name):
+        """
+        Check whether a job exists, answering from the job cache when possible
+
+        Returns:
+            tuple: (exists, status_code)
+        """
+        known = self.job_cache.lookup(job_name)
+        if known is not None:
+            return known, 200 if known else 404
+
+        # Unknown name (e.g. created since the last refresh): ask Jenkins once
+        job_url = f"{self.jenkins_url}/job/{job_name}/api/json"
+        response = self.session.get(job_url, params=JOB_CHECK_PARAMS, timeout=self.timeout)
+        if response.status_code == 200:
+            self.job_cache.add(job_name)
+        elif response.status_code == 404:
+            self.job_cache.mark_missing(job_name)
+        return response.status_code == 200, response.status_code
 
     def trigger_job(self, job_name, parameters=None):
         """
@@ -21,46 +184,60 @@ class JenkinsService:
         Returns:
             dict: Response from Jenkins API
         """
+        self.start_job_refresher()
         try:
             # Check if job exists first
-            job_url = f"{self.jenkins_url}/job/{job_name}/api/json"
-            response = requests.get(job_url, auth=self.auth)
-            
-            if response.status_code != 200:
-                return {
-                    'status': 'error',
-                    'message': f'Job {job_name} not found or access denied',
-                    'status_code': response.status_code
-                }
-
-            # Build URL depends on whether we have parameters or not
-            if parameters:
-                build_url = f"{self.jenkins_url}/job/{job_name}/buildWithParameters"
-                response = requests.post(build_url, auth=self.auth, params=parameters)
-            else:
-                build_url = f"{self.jenkins_url}/job/{job_name}/build"
-                response = requests.post(build_url, auth=self.auth)
-
-            if response.status_code in [200, 201]:
-                queue_location = response.headers.get('Location')
-                return {
-                    'status': 'success',
-                    'message': f'Job {job_name} triggered successfully',
-                    'queue_location': queue_location,
-                    'status_code': response.status_code
-                }
-            else:
-                logger.error(f"Failed to trigger job {job_name}. Status code: {response.status_code}")
-                return {
-                    'status': 'error',
-                    'message': f'Failed to trigger job {job_name}',
-                    'status_code': response.status_code
-                }
+            exists, status_code = self.job_exists(job_name)
+            if not exists:
+                return job_not_found_result(job_name, status_code)
+
+            build_url, params = build_trigger_request(self.jenkins_url, job_name, parameters)
+            response = self.session.post(build_url, params=params, timeout=self.timeout)
+            if response.status_code == 404:
+                # Job was deleted since it was cached
+                self.job_cache.mark_missing(job_name)
+                return job_not_found_result(job_name, response.status_code)
+            return trigger_result(job_name, response.status_code, response.headers)
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error triggering Jenkins job: {str(e)}")
-            return {
-                'status': 'error',
-                'message': f'Error connecting to Jenkins: {str(e)}',
-                'status_code': 500
-            }
+            return connection_error_result(e)
+
+    def get_queue_item(self, queue_id):
+        """Fetch a queue item's JSON, or None once Jenkins has forgotten it"""
+        response = self.session.get(f"{self.jenkins_url}/queue/item/{queue_id}/api/json",
+                                    timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def get_build(self, build_url):
+        """Fetch number/building/result for a build URL taken from a queue item"""
+        response = self.session.get(f"{build_url.rstrip('/')}/api/json",
+                                    params=BUILD_STATUS_PARAMS, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def trigger_jobs(self, jobs, max_parallel=None):
+        """
+        Trigger many jobs concurrently with bounded parallelism
+
+        Args:
+            jobs (list): (job_name, parameters) tuples
+            max_parallel (int): Max concurrent triggers (default: Config.JENKINS_BATCH_PARALLELISM)
+
+        Returns:
+            list: One result dict per job, in request order, each with a 'job' key
+        """
+        max_parallel = max_parallel or Config.JENKINS_BATCH_PARALLELISM
+
+        def trigger(job):
+            job_name, parameters = job
+            return {'job': job_name, **self.trigger_job(job_name, parameters)}
+
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(jobs))) as executor:
+            return list(executor.map(trigger, jobs))
+
+    def close(self):
+        self._stop_refresh.set()
+        self.session.close()
@@ -0,0 +1,58 @@
+import threading
+import time
+
+class JobCache:
+    """
+    TTL cache of Jenkins job names.
+
+    The known-job set is filled in bulk from one `/api/json?tree=jobs[name]`
+    call and each name expires `ttl` seconds after it was last confirmed;
+    names that turn out not to exist are remembered for a shorter negative
+    TTL. The cache only stores state, so the sync and async Jenkins
+    services can share it and do their own HTTP calls.
+    """
+
+    def __init__(self, ttl, negative_ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._jobs = {}     # job name -> time it was last confirmed to exist
+        self._missing = {}  # job name -> time it was found missing
+        self._lock = threading.Lock()
+
+    def lookup(self, job_name):
+        """True if recently confirmed, False if recently found missing, None if unknown or stale"""
+        with self._lock:
+            known_at = self._jobs.get(job_name)
+            if known_at is not None:
+                if self.clock() - known_at < self.ttl:
+                    return True
+                del self._jobs[job_name]
+            missing_at = self._missing.get(job_name)
+            if missing_at is not None:
+                if self.clock() - missing_at < self.negative_ttl:
+                    return False
+                del self._missing[job_name]
+        return None
+
+    def replace_jobs(self, job_names):
+        """Swap in a freshly fetched job list"""
+        with self._lock:
+            now = self.clock()
+            self._jobs = dict.fromkeys(job_names, now)
+            # A job created since it was marked missing is now known
+            for job_name in self._missing.keys() & self._jobs.keys():
+                del self._missing[job_name]
+
+    def add(self, job_name):
+        with self._lock:
+            self._jobs[job_name] = self.clock()
+            self._missing.pop(job_name, None)
+
+    def mark_missing(self, job_name):
+        with self._lock:
+            self._jobs.pop(job_name, None)
+            self._missing[job_name] = self.clock()
+
+def job_names_from_response(data):
+    return [job['name'] for job in data.get('jobs', [])]
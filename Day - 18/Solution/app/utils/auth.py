@@ -1,15 +1,77 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import threading
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
+from flask import g, request, jsonify
 from app.config import Config
 
+# Authorization header digest -> (username, configured credentials it was verified against)
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+
+def check_credentials(username, password):
+    """Constant-time comparison of both username and password against Config"""
+    expected_username = (Config.BASIC_AUTH_USERNAME or '').encode('utf-8')
+    expected_password = (Config.BASIC_AUTH_PASSWORD or '').encode('utf-8')
+    # Compare both fields every time so timing reveals neither which one failed nor a prefix
+    username_ok = hmac.compare_digest((username or '').encode('utf-8'), expected_username)
+    password_ok = hmac.compare_digest((password or '').encode('utf-8'), expected_password)
+    return (username_ok & password_ok) and bool(expected_username)
+
+def parse_basic_auth(header_value):
+    """Return (username, password) from a Basic Authorization header, or None"""
+    scheme, _, encoded = (header_value or '').partition(' ')
+    if scheme.lower() != 'basic':
+        return None
+    try:
+        username, sep, password = base64.b64decode(encoded, validate=True).decode('utf-8').partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return (username, password) if sep else None
+
+def authenticate(header_value):
+    """
+    Verify a Basic Authorization header
+
+    Verified headers are kept in a small LRU cache so repeat callers skip the
+    decode and compare. Entries are tied to the configured credentials and
+    stop matching as soon as those change.
+
+    Returns:
+        str: The authenticated username, or None
+    """
+    if not header_value:
+        return None
+    key = hashlib.sha256(header_value.encode('utf-8')).digest()
+    configured = (Config.BASIC_AUTH_USERNAME, Config.BASIC_AUTH_PASSWORD)
+    with _verified_lock:
+        cached = _verified.get(key)
+        if cached is not None and cached[1] == configured:
+            _verified.move_to_end(key)
+            return cached[0]
+
+    credentials = parse_basic_auth(header_value)
+    if not credentials or not check_credentials(*credentials):
+        return None
+
+    with _verified_lock:
+        _verified[key] = (credentials[0], configured)
+        while len(_verified) > Config.AUTH_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return credentials[0]
+
 def basic_auth_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth = request.authorization
-        if not auth or not (auth.username == Config.BASIC_AUTH_USERNAME and auth.password == Config.BASIC_AUTH_PASSWORD):
+        username = authenticate(request.headers.get('Authorization'))
+        if username is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Basic authentication required'
             }), 401
+        g.auth_username = username
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from app.config import Config
+
+class InMemoryBucketStore:
+    """Token buckets in a process-local dict; fine for a single worker process"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> [tokens, last refill time, rate, burst]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost, now):
+        """Refill and try to take `cost` tokens; returns (allowed, tokens left)"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict_full(now)
+                bucket = self._buckets[key] = [burst, now, rate, burst]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            bucket[0], bucket[1] = tokens, now
+            return allowed, tokens
+
+    def _evict_full(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [key for key, (tokens, last, rate, burst) in self._buckets.items()
+                if tokens + (now - last) * rate >= burst]
+        for key in full:
+            del self._buckets[key]
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis (atomic Lua script)"""
+
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst, cost, now):
+        allowed, tokens = self._take(keys=[f"{self.prefix}{key}"], args=[rate, burst, cost, now])
+        return bool(allowed), float(tokens)
+
+def create_bucket_store():
+    """Build the bucket store selected by Config.RATE_LIMIT_BACKEND"""
+    if Config.RATE_LIMIT_BACKEND == 'redis':
+        import redis
+        return RedisBucketStore(redis.Redis.from_url(Config.RATE_LIMIT_REDIS_URL))
+    return InMemoryBucketStore()
+
+class TokenBucketLimiter:
+    def __init__(self, rate, burst, store, clock=time.time):
+        self.rate = rate
+        self.burst = burst
+        self.store = store
+        self.clock = clock
+
+    def allow(self, key, cost=1):
+        """
+        Try to spend `cost` tokens from the bucket for `key`
+
+        Returns:
+            tuple: (allowed, retry_after seconds; 0 when allowed)
+        """
+        allowed, tokens = self.store.take(key, self.rate, self.burst, cost, self.clock())
+        if allowed:
+            return True, 0
+        if cost > self.burst:
+            return False, None
+        return False, math.ceil((cost - tokens) / self.rate)
+
+class TriggerRateLimiter:
+    """Per-client and per-job token buckets checked before anything reaches Jenkins"""
+
+    def __init__(self, store=None, enabled=None, max_batch_size=None):
+        self.enabled = Config.RATE_LIMIT_ENABLED if enabled is None else enabled
+        max_batch_size = Config.JENKINS_MAX_BATCH_SIZE if max_batch_size is None else max_batch_size
+        # A batch costs one client token per job; a valid batch bigger than the
+        # burst could never be admitted, so refuse that configuration up front
+        if self.enabled and max_batch_size > Config.RATE_LIMIT_CLIENT_BURST:
+            raise ValueError(
+                f"RATE_LIMIT_CLIENT_BURST ({Config.RATE_LIMIT_CLIENT_BURST:g}) must be at least "
+                f"JENKINS_MAX_BATCH_SIZE ({max_batch_size})")
+        store = store or create_bucket_store()
+        # Redis calls block; async callers should run checks in a thread
+        self.blocking = isinstance(store, RedisBucketStore)
+        self.clients = TokenBucketLimiter(Config.RATE_LIMIT_CLIENT_RATE,
+                                          Config.RATE_LIMIT_CLIENT_BURST, store)
+        self.jobs = TokenBucketLimiter(Config.RATE_LIMIT_JOB_RATE,
+                                       Config.RATE_LIMIT_JOB_BURST, store)
+
+    def check_client(self, client_id, cost=1):
+        if not self.enabled:
+            return True, 0
+        return self.clients.allow(f"client:{client_id}", cost)
+
+    def check_job(self, job_name):
+        if not self.enabled:
+            return True, 0
+        return self.jobs.allow(f"job:{job_name}")
+
+def rate_limited_result(message, retry_after):
+    return {
+        'status': 'error',
+        'message': message,
+        'retry_after': retry_after,
+        'status_code': 429
+    }
+
+def split_rate_limited_jobs(rate_limiter, jobs):
+    """
+    Check each batch job against its per-job bucket
+
+    Returns:
+        tuple: (allowed (job_name, parameters) list, results list holding a 429
+        result for each rejected job and None where an allowed job goes)
+    """
+    allowed_jobs, results = [], []
+    for job_name, parameters in jobs:
+        allowed, retry_after = rate_limiter.check_job(job_name)
+        if allowed:
+            allowed_jobs.append((job_name, parameters))
+            results.append(None)
+        else:
+            results.append({'job': job_name, **rate_limited_result(
+                f'Job {job_name} is being triggered too often', retry_after)})
+    return allowed_jobs, results
+
+def merge_batch_results(results, triggered):
+    """Fill the None slots left by split_rate_limited_jobs with the trigger results, in order"""
+    triggered = iter(triggered)
+    return [result if result is not None else next(triggered) for result in results]
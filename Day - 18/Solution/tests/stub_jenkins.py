@@ -0,0 +1,113 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+class StubJenkins:
+    """In-process fake Jenkins that records requests and client connections"""
+
+    def __init__(self, jobs=('test-job',), queue_polls=1, build_polls=1):
+        self.jobs = set(jobs)
+        # How many GETs a queue item stays queued / a build stays running
+        self.queue_polls = queue_polls
+        self.build_polls = build_polls
+        self.queue_items = {}  # queue id -> [job name, remaining queued polls, remaining build polls]
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.queue_id = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request_count(self, method=None, path_prefix=''):
+        with self.lock:
+            return sum(1 for m, p in self.requests
+                       if (method is None or m == method) and p.startswith(path_prefix))
+
+    def handle(self, method, path):
+        """Return (status, headers, body dict) for a request"""
+        parts = path.strip('/').split('/')
+        if path == '/api/json':
+            return 200, {}, {'jobs': [{'name': name} for name in sorted(self.jobs)]}
+        if parts[:2] == ['queue', 'item'] and len(parts) >= 3:
+            return self._queue_item(int(parts[2]))
+        if len(parts) >= 2 and parts[0] == 'job':
+            if parts[1] not in self.jobs:
+                return 404, {}, {}
+            if method == 'GET' and parts[2:] == ['api', 'json']:
+                return 200, {}, {'name': parts[1]}
+            if method == 'POST' and parts[2:] in (['build'], ['buildWithParameters']):
+                with self.lock:
+                    self.queue_id += 1
+                    queue_id = self.queue_id
+                    self.queue_items[queue_id] = [parts[1], self.queue_polls, self.build_polls]
+                return 201, {'Location': f"{self.url}/queue/item/{queue_id}/"}, {}
+            if method == 'GET' and len(parts) >= 3 and parts[2].isdigit():
+                return self._build(int(parts[2]))
+        return 404, {}, {}
+
+    def _queue_item(self, queue_id):
+        # Builds get the same number as their queue item to keep the stub simple
+        with self.lock:
+            item = self.queue_items.get(queue_id)
+            if item is None:
+                return 404, {}, {}
+            if item[1] > 0:
+                item[1] -= 1
+                return 200, {}, {'id': queue_id, 'why': 'Waiting for next available executor'}
+        return 200, {}, {'id': queue_id, 'executable': {
+            'number': queue_id, 'url': f"{self.url}/job/{item[0]}/{queue_id}/"
+        }}
+
+    def _build(self, number):
+        with self.lock:
+            item = self.queue_items.get(number)
+            if item is None:
+                return 404, {}, {}
+            if item[2] > 0:
+                item[2] -= 1
+                return 200, {}, {'number': number, 'building': True, 'result': None}
+        return 200, {}, {'number': number, 'building': False, 'result': 'SUCCESS'}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                path = urlparse(self.path).path
+                with stub.lock:
+                    stub.requests.append((self.command, path))
+                    stub.connections.add(self.client_address)
+                status, headers, body = stub.handle(self.command, path)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+        return Handler
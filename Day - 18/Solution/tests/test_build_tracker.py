@@ -0,0 +1,87 @@
+import threading
+import unittest
+from app.services.build_tracker import BuildTracker, FINISHED, EXPIRED
+from app.services.jenkins_service import JenkinsService
+from stub_jenkins import StubJenkins
+
+class TestBuildTracker(unittest.TestCase):
+    def setUp(self):
+        self.jenkins = StubJenkins(queue_polls=2, build_polls=2).start()
+        self.service = JenkinsService(jenkins_url=self.jenkins.url)
+        self.tracker = BuildTracker(self.service, min_interval=0.01, max_interval=0.05)
+
+    def tearDown(self):
+        self.service.close()
+        self.jenkins.stop()
+
+    def wait_until_done(self, queue_id):
+        status = self.tracker.track(queue_id)
+        while status['state'] not in (FINISHED, EXPIRED):
+            status = self.tracker.wait_for_change(queue_id, status['version'], timeout=5)
+        return status
+
+    def test_follows_queue_item_to_finished_build(self):
+        result = self.service.trigger_job('test-job')
+        status = self.wait_until_done(result['queue_id'])
+
+        self.assertEqual(status['state'], FINISHED)
+        self.assertEqual(status['result'], 'SUCCESS')
+        self.assertEqual(status['build_number'], result['queue_id'])
+
+    def test_many_waiters_share_one_poller(self):
+        queue_id = self.service.trigger_job('test-job')['queue_id']
+        statuses = []
+        waiters = [threading.Thread(target=lambda: statuses.append(self.wait_until_done(queue_id)))
+                   for _ in range(20)]
+        for waiter in waiters:
+            waiter.start()
+        for waiter in waiters:
+            waiter.join(10)
+
+        self.assertEqual(len(statuses), 20)
+        self.assertTrue(all(status['state'] == FINISHED for status in statuses))
+        # Polls depend on the build's progress, not on the number of waiters
+        self.assertLessEqual(self.jenkins.request_count('GET', '/queue/item/'), 3)
+        self.assertLessEqual(self.jenkins.request_count('GET', f'/job/test-job/{queue_id}/'), 3)
+
+    def test_unknown_queue_item_expires(self):
+        status = self.wait_until_done(9999)
+        self.assertEqual(status['state'], EXPIRED)
+
+class FlakyJenkinsService:
+    """Fake service that fails once unexpectedly and reports the build URL late"""
+
+    def __init__(self):
+        self.queue_polls = 0
+        self.build_urls = []
+
+    def get_queue_item(self, queue_id):
+        self.queue_polls += 1
+        if self.queue_polls == 1:
+            raise RuntimeError('unexpected failure')
+        if self.queue_polls == 2:
+            return {'executable': {'number': 7}}  # no url yet
+        return {'executable': {'number': 7, 'url': 'http://jenkins/job/test-job/7/'}}
+
+    def get_build(self, build_url):
+        self.build_urls.append(build_url)
+        return {'building': False, 'result': 'SUCCESS'}
+
+class TestBuildTrackerErrors(unittest.TestCase):
+    def test_poller_survives_errors_and_waits_for_build_url(self):
+        service = FlakyJenkinsService()
+        tracker = BuildTracker(service, min_interval=0.01, max_interval=0.05)
+
+        with self.assertLogs('app.services.build_tracker', level='ERROR'):
+            status = tracker.track(1)
+            for _ in range(10):
+                if status['state'] == FINISHED:
+                    break
+                status = tracker.wait_for_change(1, status['version'], timeout=1)
+
+        self.assertEqual(status['state'], FINISHED)
+        self.assertEqual(status['result'], 'SUCCESS')
+        self.assertEqual(service.build_urls, ['http://jenkins/job/test-job/7/'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from app.services.jenkins_service import JenkinsService
+from app.services.job_cache import JobCache
+from stub_jenkins import StubJenkins
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+POOL_SIZE = 8
+TRIGGERS = 200
+
+class TestJenkinsServiceLoad(unittest.TestCase):
+    def setUp(self):
+        self.jenkins = StubJenkins().start()
+
+    def tearDown(self):
+        self.jenkins.stop()
+
+    def test_trigger_job_success(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        result = service.trigger_job('test-job', {'param1': 'value1'})
+        self.assertEqual(result['status'], 'success')
+        self.assertIn('/queue/item/', result['queue_location'])
+
+    def test_trigger_missing_job(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        result = service.trigger_job('missing-job')
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['status_code'], 404)
+
+    def test_concurrent_triggers_reuse_pooled_connections(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url, pool_size=POOL_SIZE)
+        with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+            results = list(executor.map(lambda _: service.trigger_job('test-job'), range(TRIGGERS)))
+        service.close()
+
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+        # Keep-alive: far fewer TCP connections than HTTP requests
+        # (plus one for the background job-list refresher)
+        self.assertLessEqual(len(self.jenkins.connections), POOL_SIZE + 1)
+
+    def test_cached_job_triggers_with_one_jenkins_call(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        service.refresh_jobs()
+        result = service.trigger_job('test-job')
+        service.close()
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(self.jenkins.request_count('GET', '/job/'), 0)
+        self.assertEqual(self.jenkins.request_count('POST', '/job/'), 1)
+
+    def test_missing_job_is_negatively_cached(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        service.refresh_jobs()
+        for _ in range(3):
+            result = service.trigger_job('missing-job')
+            self.assertEqual(result['status_code'], 404)
+        service.close()
+
+        self.assertLessEqual(self.jenkins.request_count('GET', '/job/missing-job'), 1)
+
+    def test_concurrent_triggers_start_one_refresher(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        refreshers = []
+        real_thread = threading.Thread
+
+        def slow_thread(*args, **kwargs):
+            # Widen the window between checking for and recording the refresher
+            if kwargs.get('name') == 'jenkins-job-refresh':
+                time.sleep(0.05)
+                refreshers.append(kwargs['name'])
+            return real_thread(*args, **kwargs)
+
+        with mock.patch('app.services.jenkins_service.threading.Thread', side_effect=slow_thread):
+            starters = [real_thread(target=service.start_job_refresher) for _ in range(8)]
+            for starter in starters:
+                starter.start()
+            for starter in starters:
+                starter.join()
+        service.close()
+
+        self.assertEqual(len(refreshers), 1)
+
+    def test_job_created_after_refresh_is_found(self):
+        service = JenkinsService(jenkins_url=self.jenkins.url)
+        service.refresh_jobs()
+        self.jenkins.jobs.add('new-job')
+        result = service.trigger_job('new-job')
+        service.close()
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(service.job_cache.lookup('new-job'), True)
+
+    @unittest.skipIf(httpx is None, "httpx is not installed")
+    def test_async_concurrent_triggers(self):
+        from app.services.async_jenkins_service import AsyncJenkinsService
+
+        async def run():
+            service = AsyncJenkinsService(jenkins_url=self.jenkins.url, pool_size=POOL_SIZE)
+            try:
+                return await asyncio.gather(
+                    *(service.trigger_job('test-job') for _ in range(TRIGGERS))
+                )
+            finally:
+                await service.close()
+
+        results = asyncio.run(run())
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+        self.assertLessEqual(len(self.jenkins.connections), POOL_SIZE)
+
+class TestJobCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = JobCache(ttl=60, negative_ttl=10, clock=lambda: self.now)
+
+    def test_known_jobs_expire_after_ttl(self):
+        self.cache.replace_jobs(['listed-job'])
+        self.now = 30
+        self.cache.add('added-job')
+        self.assertTrue(self.cache.lookup('listed-job'))
+
+        self.now = 60
+        self.assertIsNone(self.cache.lookup('listed-job'))
+        self.assertTrue(self.cache.lookup('added-job'))
+
+        self.now = 90
+        self.assertIsNone(self.cache.lookup('added-job'))
+
+    def test_missing_jobs_expire_after_negative_ttl(self):
+        self.cache.mark_missing('missing-job')
+        self.assertIs(self.cache.lookup('missing-job'), False)
+        self.now = 10
+        self.assertIsNone(self.cache.lookup('missing-job'))
+
+if __name__ == '__main__':
+    unittest.main()
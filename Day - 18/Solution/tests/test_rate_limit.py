@@ -0,0 +1,105 @@
+import base64
+import unittest
+from unittest import mock
+from app.config import Config
+from app.utils import auth
+from app.utils.rate_limit import InMemoryBucketStore, TokenBucketLimiter, TriggerRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = TokenBucketLimiter(rate=2, burst=5, store=InMemoryBucketStore(),
+                                          clock=self.clock)
+
+    def test_burst_then_reject(self):
+        for _ in range(5):
+            self.assertEqual(self.limiter.allow('client-a'), (True, 0))
+        allowed, retry_after = self.limiter.allow('client-a')
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 1)
+
+    def test_refills_over_time(self):
+        for _ in range(5):
+            self.limiter.allow('client-a')
+        self.clock.now += 1  # 2 tokens per second
+        self.assertTrue(self.limiter.allow('client-a')[0])
+        self.assertTrue(self.limiter.allow('client-a')[0])
+        self.assertFalse(self.limiter.allow('client-a')[0])
+
+    def test_keys_are_independent(self):
+        for _ in range(5):
+            self.limiter.allow('client-a')
+        self.assertTrue(self.limiter.allow('client-b')[0])
+
+    def test_cost_larger_than_burst_never_fits(self):
+        self.assertEqual(self.limiter.allow('client-a', cost=6), (False, None))
+
+    def test_full_buckets_are_evicted_when_store_is_full(self):
+        store = InMemoryBucketStore(max_keys=2)
+        limiter = TokenBucketLimiter(rate=2, burst=5, store=store, clock=self.clock)
+        limiter.allow('a')
+        limiter.allow('b')
+        self.clock.now += 10
+        limiter.allow('c')
+        self.assertEqual(set(store._buckets), {'c'})
+
+class TestTriggerRateLimiterConfig(unittest.TestCase):
+    def test_default_max_batch_fits_client_burst(self):
+        limiter = TriggerRateLimiter(store=InMemoryBucketStore(), enabled=True)
+        allowed, _ = limiter.check_client('api-user', cost=Config.JENKINS_MAX_BATCH_SIZE)
+        self.assertTrue(allowed)
+
+    def test_batch_larger_than_burst_is_rejected_at_startup(self):
+        with mock.patch.object(Config, 'RATE_LIMIT_CLIENT_BURST', 50):
+            with self.assertRaises(ValueError):
+                TriggerRateLimiter(store=InMemoryBucketStore(), enabled=True, max_batch_size=100)
+            # Nothing to enforce when rate limiting is off
+            TriggerRateLimiter(store=InMemoryBucketStore(), enabled=False, max_batch_size=100)
+
+class TestAuthentication(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(Config, 'BASIC_AUTH_USERNAME', 'api-user'),
+            mock.patch.object(Config, 'BASIC_AUTH_PASSWORD', 'secret'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        auth._verified.clear()
+
+    @staticmethod
+    def header(username, password):
+        return 'Basic ' + base64.b64encode(f"{username}:{password}".encode()).decode()
+
+    def test_valid_credentials(self):
+        self.assertEqual(auth.authenticate(self.header('api-user', 'secret')), 'api-user')
+
+    def test_invalid_credentials(self):
+        self.assertIsNone(auth.authenticate(self.header('api-user', 'wrong')))
+        self.assertIsNone(auth.authenticate(self.header('other', 'secret')))
+        self.assertIsNone(auth.authenticate('Bearer token'))
+        self.assertIsNone(auth.authenticate('Basic not-base64!'))
+        self.assertIsNone(auth.authenticate(None))
+
+    def test_verified_header_is_cached(self):
+        header = self.header('api-user', 'secret')
+        auth.authenticate(header)
+        with mock.patch.object(auth, 'check_credentials') as check:
+            self.assertEqual(auth.authenticate(header), 'api-user')
+            check.assert_not_called()
+
+    def test_cache_does_not_survive_credential_change(self):
+        header = self.header('api-user', 'secret')
+        auth.authenticate(header)
+        with mock.patch.object(Config, 'BASIC_AUTH_PASSWORD', 'rotated'):
+            self.assertIsNone(auth.authenticate(header))
+
+if __name__ == '__main__':
+    unittest.main()
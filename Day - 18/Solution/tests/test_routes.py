@@ -1,5 +1,11 @@
 import unittest
+from unittest import mock
 from app import create_app
+from app import routes
+from app.config import Config
+from app.services.jenkins_service import JenkinsService
+from app.utils.rate_limit import InMemoryBucketStore, TriggerRateLimiter
+from stub_jenkins import StubJenkins
 import os
 
 class TestJenkinsAPI(unittest.TestCase):
@@ -28,5 +34,61 @@ class TestJenkinsAPI(unittest.TestCase):
         # We're just testing the auth flow here
         self.assertIn(response.status_code, [404, 500])
 
+class TestBatchTrigger(unittest.TestCase):
+    def setUp(self):
+        self.jenkins = StubJenkins(jobs=['job-a', 'job-b', 'job-c']).start()
+        self.service = JenkinsService(jenkins_url=self.jenkins.url)
+        patches = [
+            mock.patch.object(routes, 'jenkins_service', self.service),
+            mock.patch.object(Config, 'BASIC_AUTH_USERNAME', 'test'),
+            mock.patch.object(Config, 'BASIC_AUTH_PASSWORD', 'test'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = create_app().test_client()
+        self.headers = {'Authorization': 'Basic dGVzdDp0ZXN0'}
+
+    def tearDown(self):
+        self.service.close()
+        self.jenkins.stop()
+
+    def test_batch_trigger_all_succeed(self):
+        response = self.client.post('/trigger-jobs', headers=self.headers, json={
+            'jobs': [{'name': 'job-a', 'parameters': {'env': 'prod'}}, 'job-b', {'name': 'job-c'}]
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['triggered'], 3)
+        self.assertEqual([result['job'] for result in body['results']], ['job-a', 'job-b', 'job-c'])
+        self.assertTrue(all('/queue/item/' in result['queue_location'] for result in body['results']))
+
+    def test_batch_trigger_partial_failure(self):
+        response = self.client.post('/trigger-jobs', headers=self.headers,
+                                    json={'jobs': ['job-a', 'missing-job']})
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual(body['status'], 'partial')
+        self.assertEqual(body['results'][1]['status_code'], 404)
+
+    def test_batch_trigger_rejects_bad_body(self):
+        response = self.client.post('/trigger-jobs', headers=self.headers, json={'jobs': []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_trigger_per_job_rate_limit(self):
+        limiter = TriggerRateLimiter(store=InMemoryBucketStore(), enabled=True)
+        limiter.jobs.burst = 1
+        with mock.patch.object(routes, 'rate_limiter', limiter):
+            response = self.client.post('/trigger-jobs', headers=self.headers,
+                                        json={'jobs': ['job-a', 'job-a', 'job-b']})
+        body = response.get_json()
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status_code'] for result in body['results']], [201, 429, 201])
+        self.assertEqual(self.jenkins.request_count('POST', '/job/job-a/'), 1)
+
+    def test_batch_trigger_unauthorized(self):
+        response = self.client.post('/trigger-jobs', json={'jobs': ['job-a']})
+        self.assertEqual(response.status_code, 401)
+
 if __name__ == '__main__':
     unittest.main()
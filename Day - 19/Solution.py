@@ -6,9 +6,102 @@
 import yaml
 import json
 import sys
+import os
+import time
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
 
-def yaml_to_json(yaml_file_path, json_file_path=None):
+# Use the libyaml C loader when PyYAML was built with it; it is many times faster
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+_NO_DOCUMENT = object()
+
+# Directory mode
+DEFAULT_PATTERNS = ("*.yaml", "*.yml")
+MANIFEST_NAME = ".yaml2json-manifest.json"  # Kept in the output dir: source mtime/size/hash
+INDEX_NAME = ".k8s-index.json"              # Inverted index of the converted objects
+INDEX_FIELDS = ("kind", "namespace", "name", "label", "image")
+CONTAINER_KEYS = ("containers", "initContainers", "ephemeralContainers")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def iter_yaml_documents(yaml_file):
+    """Lazily parse the documents of a (multi-document) YAML stream one at a time"""
+    return yaml.load_all(yaml_file, Loader=SafeLoader)
+
+def write_json_stream(docs, out, output_format='json', indent=2):
+    """
+    Serialize documents to `out` as they are produced, holding about one document in memory.
+
+    Args:
+        docs (iterable): Parsed YAML documents
+        out (file): Text stream to write to
+        output_format (str): 'json' writes a single object for one document and an
+                             array for several; 'ndjson' writes one compact document per line
+        indent (int, optional): Indentation for 'json' output (None for compact)
+
+    Returns:
+        int: Number of documents written
+    """
+    if output_format == 'ndjson':
+        count = 0
+        for doc in docs:
+            out.write(json.dumps(doc, separators=(',', ':')))
+            out.write("\n")
+            count += 1
+        return count
+
+    # Look one document ahead to decide between a bare object and an array
+    docs = iter(docs)
+    first = next(docs, _NO_DOCUMENT)
+    if first is _NO_DOCUMENT:
+        out.write("[]")
+        return 0
+    second = next(docs, _NO_DOCUMENT)
+    if second is _NO_DOCUMENT:
+        out.write(json.dumps(first, indent=indent))
+        return 1
+
+    # Write the array incrementally; nested lines get one extra indent level
+    # (JSON strings never contain raw newlines, so this is safe)
+    pad = " " * indent if indent else ""
+    separator = f",\n{pad}" if indent else ","
+    out.write(f"[\n{pad}" if indent else "[")
+    count = 0
+    for doc in chain((first, second), docs):
+        if count:
+            out.write(separator)
+        out.write(json.dumps(doc, indent=indent).replace("\n", f"\n{pad}"))
+        count += 1
+    out.write("\n]" if indent else "]")
+    return count
+
+@contextmanager
+def atomic_write(path):
+    """Write to a temp file next to `path` and rename it into place only on success"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates 0600; give the result the mode a plain open() would have
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        with os.fdopen(fd, 'w') as tmp_file:
+            yield tmp_file
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def yaml_to_json(yaml_file_path, json_file_path=None, output_format='json', indent=2):
     """
     Convert a Kubernetes YAML config file to JSON format.
     
@@ -16,43 +109,312 @@ def yaml_to_json(yaml_file_path, json_file_path=None):
         yaml_file_path (str): Path to the input YAML file
         json_file_path (str, optional): Path to save the JSON output. 
                                         If None, prints to stdout.
+        output_format (str, optional): 'json' (default) or 'ndjson'
+        indent (int, optional): Indentation for 'json' output (None for compact)
     """
     try:
-        # Read the YAML file
+        # Read the YAML file; documents are parsed and written one at a time
+        # (Kubernetes files may contain multiple documents)
         with open(yaml_file_path, 'r') as yaml_file:
-            # Load all documents from the YAML file (Kubernetes files may contain multiple documents)
-            yaml_docs = list(yaml.safe_load_all(yaml_file))
-            
-            # If single document, convert directly
-            if len(yaml_docs) == 1:
-                json_data = json.dumps(yaml_docs[0], indent=2)
-            else:
-                # For multiple documents, create a JSON array
-                json_data = json.dumps(yaml_docs, indent=2)
+            docs = iter_yaml_documents(yaml_file)
             
             # Output the result
             if json_file_path:
-                with open(json_file_path, 'w') as json_file:
-                    json_file.write(json_data)
+                with atomic_write(json_file_path) as json_file:
+                    write_json_stream(docs, json_file, output_format, indent)
                 print(f"Successfully converted {yaml_file_path} to {json_file_path}")
             else:
-                print(json_data)
+                write_json_stream(docs, sys.stdout, output_format, indent)
+                sys.stdout.write("\n" if output_format == 'json' else "")
                 
     except yaml.YAMLError as e:
         print(f"Error parsing YAML file: {e}", file=sys.stderr)
     except Exception as e:
         print(f"An error occurred: {e}", file=sys.stderr)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python yaml_to_json.py <input.yaml> [output.json]")
+def find_images(node, images):
+    """Collect container images from any pod spec nested in a Kubernetes object"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in CONTAINER_KEYS and isinstance(value, list):
+                images.update(c['image'] for c in value
+                              if isinstance(c, dict) and isinstance(c.get('image'), str))
+            elif isinstance(value, (dict, list)):
+                find_images(value, images)
+    elif isinstance(node, list):
+        for item in node:
+            find_images(item, images)
+    return images
+
+def describe_object(doc):
+    """Summarise one document for the index: kind/namespace/name/labels/images"""
+    if not isinstance(doc, dict):
+        return None
+    metadata = doc.get('metadata') if isinstance(doc.get('metadata'), dict) else {}
+    labels = metadata.get('labels') if isinstance(metadata.get('labels'), dict) else {}
+    return {
+        'kind': doc.get('kind'),
+        'namespace': metadata.get('namespace'),
+        'name': metadata.get('name'),
+        'labels': {str(k): str(v) for k, v in labels.items()},
+        'images': sorted(find_images(doc.get('spec'), set())),
+    }
+
+def convert_one(src, dst, output_format, indent, known_hash):
+    """
+    Process-pool worker: convert one file unless its content hash is unchanged.
+
+    Returns:
+        tuple: (src, status, sha256, size, objects, error) where status is
+               'converted', 'unchanged' or 'failed' and objects holds
+               describe_object() for each document (None when unchanged)
+    """
+    try:
+        # Hash in blocks and parse from the open file, so a worker never holds a whole file
+        sha256 = hashlib.sha256()
+        size = 0
+        with open(src, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                sha256.update(block)
+                size += len(block)
+        digest = sha256.hexdigest()
+        if digest == known_hash and Path(dst).exists():
+            return src, 'unchanged', digest, size, None, None
+
+        objects = []
+
+        def described(docs):
+            # Record index entries as documents stream through the writer
+            for doc in docs:
+                objects.append(describe_object(doc))
+                yield doc
+
+        with open(src, 'rb') as yaml_file, atomic_write(dst) as out:
+            write_json_stream(described(iter_yaml_documents(yaml_file)), out, output_format, indent)
+        return src, 'converted', digest, size, objects, None
+    except (OSError, ValueError, TypeError, yaml.YAMLError) as e:
+        return src, 'failed', None, 0, None, str(e)
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def is_generated(path, input_dir, output_dir, suffix):
+    """
+    True for files this tool writes: the manifest, the index, temp files and,
+    when converting in place, the JSON outputs; and anything under an output
+    dir nested inside the input dir.
+    """
+    if path.name in (MANIFEST_NAME, INDEX_NAME) or path.name.endswith(".tmp"):
+        return True
+    if output_dir.resolve() == input_dir.resolve():
+        return path.suffix == suffix
+    return output_dir.resolve() in path.resolve().parents
+
+def convert_directory(input_dir, output_dir, patterns=DEFAULT_PATTERNS, workers=None,
+                      output_format='json', indent=2):
+    """
+    Convert every matching YAML file under input_dir into output_dir, mirroring the tree.
+
+    Files whose mtime and size match the manifest are skipped without being read;
+    touched-but-identical files are skipped after a hash check in the worker.
+
+    Returns:
+        dict: Summary counts, bytes processed and elapsed seconds
+    """
+    start = time.perf_counter()
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    manifest_path = output_dir / MANIFEST_NAME
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {}
+    suffix = ".ndjson" if output_format == 'ndjson' else ".json"
+
+    sources = sorted({path for pattern in patterns for path in input_dir.rglob(pattern)
+                      if path.is_file() and not is_generated(path, input_dir, output_dir, suffix)})
+    summary = {'scanned': len(sources), 'converted': 0, 'unchanged': 0, 'failed': 0, 'bytes': 0}
+    jobs = []
+    for src in sources:
+        rel = src.relative_to(input_dir).as_posix()
+        dst = (output_dir / rel).with_suffix(suffix)
+        stat = src.stat()
+        entry = old_manifest.get(rel)
+        # Entries from before indexing existed have no 'objects' and are reconverted once
+        reusable = entry and entry.get('format') == output_format and 'objects' in entry
+        if reusable and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size \
+                and dst.exists():
+            new_manifest[rel] = entry
+            summary['unchanged'] += 1
+            continue
+        known_hash = entry['sha256'] if reusable else None
+        jobs.append((rel, str(src), str(dst), known_hash, stat))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (rel, stat, executor.submit(convert_one, src, dst, output_format, indent, known_hash))
+                for rel, src, dst, known_hash, stat in jobs
+            ]
+            for rel, stat, future in futures:
+                src, status, digest, size, objects, error = future.result()
+                summary[status] += 1
+                summary['bytes'] += size
+                if status == 'failed':
+                    print(f"Error converting {src}: {error}", file=sys.stderr)
+                    continue
+                if objects is None:
+                    objects = old_manifest[rel]['objects']
+                new_manifest[rel] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                                     'sha256': digest, 'format': output_format,
+                                     'objects': objects}
+
+    with atomic_write(manifest_path) as f:
+        json.dump(new_manifest, f)
+    with atomic_write(output_dir / INDEX_NAME) as f:
+        json.dump(build_index(new_manifest, output_dir, suffix), f)
+    summary['elapsed'] = time.perf_counter() - start
+    return summary
+
+def build_index(manifest, output_dir, suffix):
+    """
+    Build the inverted index from the per-file object summaries in the manifest.
+
+    Each object gets an integer id; postings map field -> value -> sorted ids.
+    Labels are indexed as "key=value" and also by bare key; images by full
+    reference and by repository without tag/digest.
+    """
+    objects = []
+    postings = {field: {} for field in INDEX_FIELDS}
+
+    def post(field, value, object_id):
+        if value is not None:
+            postings[field].setdefault(str(value), []).append(object_id)
+
+    for rel in sorted(manifest):
+        output = str((Path(output_dir) / rel).with_suffix(suffix))
+        for position, obj in enumerate(manifest[rel].get('objects') or []):
+            if obj is None:
+                continue
+            object_id = len(objects)
+            objects.append({'source': rel, 'output': output, 'document': position, **obj})
+            post('kind', obj['kind'], object_id)
+            post('namespace', obj['namespace'], object_id)
+            post('name', obj['name'], object_id)
+            for key, value in obj['labels'].items():
+                post('label', f"{key}={value}", object_id)
+                post('label', key, object_id)
+            for image in obj['images']:
+                post('image', image, object_id)
+                repository = image_repository(image)
+                if repository != image:
+                    post('image', repository, object_id)
+    return {'objects': objects, 'postings': postings}
+
+def image_repository(image):
+    """Strip the tag and/or digest from an image reference"""
+    image = image.split('@', 1)[0]
+    name, sep, tag = image.rpartition(':')
+    # A ':' followed by a '/' is a registry port, not a tag
+    return name if sep and '/' not in tag else image
+
+def query_index(output_dir, **criteria):
+    """
+    Look up objects in a converted directory's index without reparsing any manifest.
+
+    Args:
+        output_dir (str): Directory written by convert_directory()
+        **criteria: Any of kind, namespace, name, label ("key" or "key=value"),
+                    image (full reference or repository); values may be lists
+                    (all must match)
+
+    Returns:
+        list: Matching object records
+    """
+    with open(Path(output_dir) / INDEX_NAME) as f:
+        index = json.load(f)
+
+    matches = None
+    for field, values in criteria.items():
+        if values is None:
+            continue
+        if field not in INDEX_FIELDS:
+            raise ValueError(f"Unknown index field: {field}")
+        for value in values if isinstance(values, (list, tuple)) else [values]:
+            ids = set(index['postings'][field].get(str(value), ()))
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+    if matches is None:
+        return index['objects']
+    return [index['objects'][object_id] for object_id in sorted(matches)]
+
+def print_summary(summary):
+    elapsed = max(summary['elapsed'], 1e-9)
+    mb = summary['bytes'] / (1024 * 1024)
+    print(f"Scanned {summary['scanned']} file(s): {summary['converted']} converted, "
+          f"{summary['unchanged']} unchanged, {summary['failed']} failed")
+    print(f"Processed {mb:.1f} MB in {elapsed:.2f}s "
+          f"({summary['scanned'] / elapsed:.0f} files/s, {mb / elapsed:.1f} MB/s)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert Kubernetes YAML configs to JSON",
+        usage="python yaml_to_json.py <input.yaml> [output.json] [--format {json,ndjson}]"
+    )
+    parser.add_argument("input_file",
+                        help="YAML file to convert, a directory to convert recursively, "
+                             "or a converted directory to search with --query")
+    parser.add_argument("output_file", nargs="?",
+                        help="Write JSON here instead of stdout (output directory in directory mode)")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="json: object/array (default); ndjson: one document per line")
+    parser.add_argument("--indent", type=int, default=2,
+                        help="Indentation for json output, 0 for compact (default: 2)")
+    parser.add_argument("--pattern", action="append",
+                        help="Directory mode: glob for files to convert, repeatable (default: *.yaml, *.yml)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Directory mode: worker processes (default: CPU count)")
+    parser.add_argument("--query", action="store_true",
+                        help="Search the index of an already converted output directory")
+    parser.add_argument("--kind", help="Query: object kind, e.g. Deployment")
+    parser.add_argument("--namespace", help="Query: metadata.namespace")
+    parser.add_argument("--name", help="Query: metadata.name")
+    parser.add_argument("--label", action="append", help="Query: label key or key=value, repeatable")
+    parser.add_argument("--image", action="append",
+                        help="Query: container image (with or without tag), repeatable")
+    return parser
+
+def run_query(args):
+    try:
+        results = query_index(args.input_file, kind=args.kind, namespace=args.namespace,
+                              name=args.name, label=args.label, image=args.image)
+    except FileNotFoundError:
+        print(f"Error: no index in {args.input_file}; convert a directory into it first",
+              file=sys.stderr)
         sys.exit(1)
+    for obj in results:
+        location = f"{obj['namespace']}/{obj['name']}" if obj['namespace'] else obj['name']
+        print(f"{obj['kind']}\t{location}\t{obj['source']}#{obj['document']}")
+    print(f"{len(results)} object(s) matched", file=sys.stderr)
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    if not Path(input_file).exists():
-        print(f"Error: File {input_file} not found", file=sys.stderr)
+    if not Path(args.input_file).exists():
+        print(f"Error: File {args.input_file} not found", file=sys.stderr)
         sys.exit(1)
     
-    yaml_to_json(input_file, output_file)
+    if args.query:
+        run_query(args)
+        sys.exit(0)
+
+    if Path(args.input_file).is_dir():
+        summary = convert_directory(args.input_file, args.output_file or args.input_file,
+                                    args.pattern or DEFAULT_PATTERNS, args.workers,
+                                    args.format, args.indent or None)
+        print_summary(summary)
+        sys.exit(1 if summary['failed'] else 0)
+
+    yaml_to_json(args.input_file, args.output_file, args.format, args.indent or None)
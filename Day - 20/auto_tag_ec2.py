@@ -6,6 +6,12 @@
 import boto3
 from botocore.exceptions import ClientError
 import argparse
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 DEFAULT_TAGS = {
     "Environment": "Dev",
@@ -13,20 +19,47 @@ DEFAULT_TAGS = {
     "AutoTagged": "True"
 }
 
-def get_instances(region):
-    ec2 = boto3.client('ec2', region_name=region)
+TAG_BATCH_SIZE = 1000        # Resource IDs per create_tags call
+MAX_PARALLEL_BATCHES = 4     # Concurrent create_tags calls per region
+MAX_TAG_ATTEMPTS = 8         # Throttled retries per batch before giving up
+THROTTLE_ERRORS = {"RequestLimitExceeded", "Throttling", "ThrottlingException"}
+INSTANCE_ID_PATTERN = re.compile(r"i-[0-9a-f]+")
+INSTANCE_ERROR_PREFIX = "InvalidInstanceID"  # Only these errors are narrowed down to single instances
+DEFAULT_STATES = ["pending", "running", "stopping", "stopped"]  # skip terminated instances
+DESCRIBE_PAGE_SIZE = 1000    # Max instances per describe_instances page
+
+def build_filters(states=None, filters=None):
+    """Server-side describe_instances filters: instance state plus any extra {name: [values]}"""
+    result = [{'Name': 'instance-state-name', 'Values': list(states or DEFAULT_STATES)}]
+    for name, values in (filters or {}).items():
+        result.append({'Name': name, 'Values': list(values)})
+    return result
+
+def get_instances(region, states=None, filters=None, ec2=None):
+    """
+    Stream instances page by page, keeping only the ID and tags of each.
+
+    Filtering happens in the API (state, plus extra filters such as tag-key
+    or vpc-id), so terminated and out-of-scope instances never leave AWS.
+    EC2 filters cannot express "tag is missing", so that check stays in
+    identify_untagged().
+
+    Yields:
+        dict: {'InstanceId': ..., 'Tags': [...]}
+    """
+    ec2 = ec2 or boto3.client('ec2', region_name=region)
     try:
         paginator = ec2.get_paginator('describe_instances')
-        response_iterator = paginator.paginate()
-        instances = []
+        response_iterator = paginator.paginate(
+            Filters=build_filters(states, filters),
+            PaginationConfig={'PageSize': DESCRIBE_PAGE_SIZE},
+        )
         for page in response_iterator:
             for reservation in page['Reservations']:
                 for instance in reservation['Instances']:
-                    instances.append(instance)
-        return instances
+                    yield {'InstanceId': instance['InstanceId'], 'Tags': instance.get('Tags', [])}
     except ClientError as e:
-        print(f"Error fetching EC2 instances: {e}")
-        return []
+        print(f"Error fetching EC2 instances in {region}: {e}")
 
 def identify_untagged(instances):
     untagged_instances = []
@@ -38,37 +71,186 @@ def identify_untagged(instances):
             untagged_instances.append((instance_id, missing_tags))
     return untagged_instances
 
-def apply_tags(region, untagged_instances, dry_run=False):
-    ec2 = boto3.client('ec2', region_name=region)
+class AdaptiveBackoff:
+    """
+    Delay shared by all batches of a region.
+
+    Every throttling error doubles the delay for every worker (so concurrent
+    batches slow down together instead of hammering the API in parallel) and
+    every success shrinks it again.
+    """
+
+    def __init__(self, base=0.1, maximum=20.0):
+        self.base = base
+        self.maximum = maximum
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        delay = self.delay
+        if delay:
+            time.sleep(random.uniform(delay / 2, delay))  # jitter
+
+    def throttled(self):
+        with self.lock:
+            self.delay = min(self.maximum, max(self.base, self.delay * 2))
+
+    def succeeded(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+def group_by_missing_tags(untagged_instances):
+    """Group instance IDs that need exactly the same tags: {frozenset(tag items): [ids]}"""
+    groups = defaultdict(list)
     for instance_id, missing_tags in untagged_instances:
-        if not missing_tags:
-            continue  # nothing to tag
-        tag_list = [{'Key': k, 'Value': v} for k, v in missing_tags.items()]
+        if missing_tags:  # nothing to tag otherwise
+            groups[frozenset(missing_tags.items())].append(instance_id)
+    return groups
+
+def tag_batch(ec2, instance_ids, tag_list, backoff, failures):
+    """
+    Tag a batch of instances, retrying throttled calls with the shared backoff.
+
+    create_tags is all-or-nothing. When a batch is rejected with an
+    InvalidInstanceID.* error, the instances named in the error are recorded as
+    failed and the rest are retried; if it names none of them, the batch is
+    split in half to isolate the culprit. Any other error (permissions, bad
+    tag values, ...) would fail every instance, so the whole batch fails.
+
+    Returns:
+        list: Instance IDs that were tagged
+    """
+    attempts = 0
+    while True:
+        backoff.wait()
         try:
-            if dry_run:
-                print(f"[DRY-RUN] Would tag {instance_id} with: {missing_tags}")
-            else:
-                ec2.create_tags(Resources=[instance_id], Tags=tag_list)
-                print(f"Tagged {instance_id} with: {missing_tags}")
+            ec2.create_tags(Resources=instance_ids, Tags=tag_list)
+            backoff.succeeded()
+            return instance_ids
         except ClientError as e:
-            print(f"Error tagging {instance_id}: {e}")
+            code = e.response.get('Error', {}).get('Code')
+            if code in THROTTLE_ERRORS:
+                backoff.throttled()
+                attempts += 1
+                if attempts < MAX_TAG_ATTEMPTS:
+                    continue
+            if (len(instance_ids) == 1 or code in THROTTLE_ERRORS or
+                    not (code or '').startswith(INSTANCE_ERROR_PREFIX)):
+                for instance_id in instance_ids:
+                    failures[instance_id] = str(e)
+                return []
+
+            named = set(INSTANCE_ID_PATTERN.findall(str(e))) & set(instance_ids)
+            if named:
+                for instance_id in named:
+                    failures[instance_id] = str(e)
+                remaining = [i for i in instance_ids if i not in named]
+                return tag_batch(ec2, remaining, tag_list, backoff, failures) if remaining else []
+            middle = len(instance_ids) // 2
+            return (tag_batch(ec2, instance_ids[:middle], tag_list, backoff, failures) +
+                    tag_batch(ec2, instance_ids[middle:], tag_list, backoff, failures))
+
+def apply_tags(region, untagged_instances, dry_run=False, ec2=None):
+    """
+    Tag instances in as few create_tags calls as possible.
+
+    Instances missing the same set of tags share a call (up to TAG_BATCH_SIZE
+    IDs each); batches run concurrently behind an AdaptiveBackoff.
+
+    Returns:
+        dict: Instance ID -> error message for every instance that could not be tagged
+    """
+    groups = group_by_missing_tags(untagged_instances)
+    batches = []
+    for tag_items, instance_ids in groups.items():
+        missing_tags = dict(sorted(tag_items))
+        for start in range(0, len(instance_ids), TAG_BATCH_SIZE):
+            batches.append((missing_tags, instance_ids[start:start + TAG_BATCH_SIZE]))
+
+    if dry_run:
+        for missing_tags, instance_ids in batches:
+            print(f"[{region}] [DRY-RUN] Would tag {len(instance_ids)} instance(s) with {missing_tags}: "
+                  f"{', '.join(instance_ids)}")
+        return {}
+
+    ec2 = ec2 or boto3.client('ec2', region_name=region)  # clients are thread-safe
+    backoff = AdaptiveBackoff()
+    failures = {}
+
+    def run(batch):
+        missing_tags, instance_ids = batch
+        tag_list = [{'Key': k, 'Value': v} for k, v in missing_tags.items()]
+        return missing_tags, tag_batch(ec2, instance_ids, tag_list, backoff, failures)
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BATCHES) as executor:
+        for missing_tags, tagged in executor.map(run, batches):
+            if tagged:
+                print(f"[{region}] Tagged {len(tagged)} instance(s) with {missing_tags}: {', '.join(tagged)}")
+
+    for instance_id, error in sorted(failures.items()):
+        print(f"[{region}] Error tagging {instance_id}: {error}")
+    return failures
+
+def tag_region(region, states=None, filters=None, dry_run=False):
+    """
+    Scan and tag one region with a single client.
+
+    Returns:
+        tuple: (region, number of untagged instances, failures dict)
+    """
+    ec2 = boto3.client('ec2', region_name=region)
+    untagged_instances = identify_untagged(get_instances(region, states, filters, ec2=ec2))
+    if not untagged_instances:
+        print(f"[{region}] All instances are fully tagged.")
+        return region, 0, {}
+
+    print(f"[{region}] Found {len(untagged_instances)} untagged or partially tagged instances.")
+    return region, len(untagged_instances), apply_tags(region, untagged_instances, dry_run, ec2=ec2)
+
+def tag_regions(regions, states=None, filters=None, dry_run=False):
+    """Scan and tag every region concurrently; total time is that of the slowest region"""
+    with ThreadPoolExecutor(max_workers=max(1, len(regions))) as executor:
+        futures = [executor.submit(tag_region, region, states, filters, dry_run) for region in regions]
+        return [future.result() for future in futures]
+
+def get_all_regions():
+    ec2 = boto3.client('ec2')
+    return [r['RegionName'] for r in ec2.describe_regions()['Regions']]
+
+def parse_filter(value):
+    """Parse 'name=v1,v2' into (name, [v1, v2]) for --filter"""
+    name, sep, values = value.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"Expected name=value[,value...], got: {value}")
+    return name, values.split(',')
 
 def main():
     parser = argparse.ArgumentParser(description="Auto-tag EC2 instances with default tags.")
-    parser.add_argument('--region', required=True, help='AWS region (e.g., us-west-2)')
+    regions = parser.add_mutually_exclusive_group(required=True)
+    regions.add_argument('--region', nargs='+', dest='regions',
+                         help='AWS region(s) to scan concurrently (e.g., us-west-2 eu-west-1)')
+    regions.add_argument('--all-regions', action='store_true', help='Scan every enabled region')
+    parser.add_argument('--state', action='append', choices=DEFAULT_STATES + ['shutting-down'],
+                        help=f"Instance state(s) to include (default: {', '.join(DEFAULT_STATES)})")
+    parser.add_argument('--filter', action='append', type=parse_filter, default=[],
+                        help='Extra server-side filter, e.g. tag-key=Team or vpc-id=vpc-123 (repeatable)')
     parser.add_argument('--dry-run', action='store_true', help='Simulate tagging without applying changes')
     args = parser.parse_args()
 
-    print(f"Scanning EC2 instances in region: {args.region}")
-    instances = get_instances(args.region)
-    untagged_instances = identify_untagged(instances)
-    
-    if not untagged_instances:
-        print("All instances are fully tagged.")
-        return
+    region_list = get_all_regions() if args.all_regions else args.regions
+    filters = defaultdict(list)
+    for name, values in args.filter:
+        filters[name].extend(values)
+
+    print(f"Scanning EC2 instances in region(s): {', '.join(region_list)}")
+    results = tag_regions(region_list, args.state, filters, dry_run=args.dry_run)
 
-    print(f"Found {len(untagged_instances)} untagged or partially tagged instances.")
-    apply_tags(args.region, untagged_instances, dry_run=args.dry_run)
+    failed = sum(len(failures) for _, _, failures in results)
+    if len(results) > 1:
+        total = sum(count for _, count, _ in results)
+        print(f"Found {total} untagged or partially tagged instances across {len(results)} region(s).")
+    if failed:
+        print(f"{failed} instance(s) could not be tagged.")
 
 if __name__ == "__main__":
     main()
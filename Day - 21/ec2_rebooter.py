@@ -7,7 +7,9 @@ import boto3
 import datetime
 import logging
 import argparse
-from botocore.exceptions import ClientError
+import time
+from array import array
+from botocore.exceptions import BotoCoreError, ClientError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -19,18 +21,29 @@ NAMESPACE = 'AWS/EC2'
 METRIC_NAME = 'CPUUtilization'
 STATISTIC = 'Average'
 REGION = 'us-east-1'  # Change to your desired region
+METRIC_QUERIES_PER_REQUEST = 500  # GetMetricData limit on MetricDataQueries
+
+# Controller mode
+CHECK_INTERVAL = 300        # Seconds between controller cycles
+WINDOW_POINTS = 6           # Datapoints kept per instance (6 x 5 min = 30 min)
+SUSTAINED_POINTS = 3        # Consecutive breaching datapoints required to reboot
+MAX_CONCURRENT_REBOOTS = 2  # Reboots allowed in flight at once
+REBOOT_SETTLE_SECONDS = 600 # A reboot counts as in flight for this long
+REBOOT_COOLDOWN = 3600      # Minimum seconds between reboots of one instance
 
 def get_running_instances(ec2):
     """Return a list of running EC2 instance IDs."""
     try:
-        response = ec2.describe_instances(
+        paginator = ec2.get_paginator('describe_instances')
+        pages = paginator.paginate(
             Filters=[
                 {'Name': 'instance-state-name', 'Values': ['running']}
             ]
         )
         instance_ids = [
             instance['InstanceId']
-            for reservation in response['Reservations']
+            for page in pages
+            for reservation in page['Reservations']
             for instance in reservation['Instances']
         ]
         logging.info(f"Found {len(instance_ids)} running instance(s).")
@@ -58,36 +71,244 @@ def get_cpu_utilization(cloudwatch, instance_id):
         if not datapoints:
             logging.warning(f"No CPU data for instance {instance_id}.")
             return 0.0
-        avg_cpu = datapoints[0][STATISTIC]
+        # Datapoints are not returned in time order
+        avg_cpu = max(datapoints, key=lambda d: d['Timestamp'])[STATISTIC]
         logging.info(f"Instance {instance_id} average CPU: {avg_cpu:.2f}%")
         return avg_cpu
     except ClientError as e:
         logging.error(f"Error fetching CPU data for {instance_id}: {e}")
         return 0.0
 
+def build_cpu_queries(instance_ids):
+    """One MetricDataQuery per instance; query IDs must start with a lowercase letter."""
+    return [
+        {
+            'Id': f"cpu{i}",
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': NAMESPACE,
+                    'MetricName': METRIC_NAME,
+                    'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+                },
+                'Period': PERIOD_MINUTES * 60,
+                'Stat': STATISTIC,
+            },
+            'ReturnData': True,
+        }
+        for i, instance_id in enumerate(instance_ids)
+    ]
+
+def get_cpu_series(cloudwatch, instance_ids, minutes=PERIOD_MINUTES):
+    """
+    Get CPU datapoints for many instances with batched GetMetricData calls.
+
+    Up to METRIC_QUERIES_PER_REQUEST instances share one request and NextToken
+    pages are followed, so a fleet of N instances costs about N/500 calls.
+
+    Returns:
+        dict: Instance ID -> [(timestamp, cpu), ...] oldest first (empty when there is no data)
+    """
+    end_time = datetime.datetime.utcnow()
+    start_time = end_time - datetime.timedelta(minutes=minutes)
+    series = {}
+
+    for start in range(0, len(instance_ids), METRIC_QUERIES_PER_REQUEST):
+        batch = instance_ids[start:start + METRIC_QUERIES_PER_REQUEST]
+        points = {f"cpu{i}": {} for i in range(len(batch))}  # query ID -> {timestamp: value}
+        kwargs = {
+            'MetricDataQueries': build_cpu_queries(batch),
+            'StartTime': start_time,
+            'EndTime': end_time,
+            'ScanBy': 'TimestampDescending',
+        }
+        try:
+            while True:
+                response = cloudwatch.get_metric_data(**kwargs)
+                # Values for one query may be spread over several pages
+                for result in response.get('MetricDataResults', []):
+                    points[result['Id']].update(zip(result.get('Timestamps', []), result.get('Values', [])))
+                if not response.get('NextToken'):
+                    break
+                kwargs['NextToken'] = response['NextToken']
+        except ClientError as e:
+            logging.error(f"Error fetching CPU data for {len(batch)} instance(s): {e}")
+
+        for i, instance_id in enumerate(batch):
+            series[instance_id] = sorted(points[f"cpu{i}"].items())
+
+    return series
+
+def get_cpu_utilizations(cloudwatch, instance_ids):
+    """
+    Get the latest average CPU utilization for many instances (see get_cpu_series).
+
+    Returns:
+        dict: Instance ID -> latest average CPU (0.0 when there is no data)
+    """
+    utilization = {}
+    for instance_id, points in get_cpu_series(cloudwatch, instance_ids).items():
+        if points:
+            utilization[instance_id] = points[-1][1]
+            logging.info(f"Instance {instance_id} average CPU: {utilization[instance_id]:.2f}%")
+        else:
+            logging.warning(f"No CPU data for instance {instance_id}.")
+            utilization[instance_id] = 0.0
+    return utilization
+
 def reboot_instance(ec2, instance_id, dry_run=True):
-    """Attempt to reboot an EC2 instance with dry-run option."""
+    """Attempt to reboot an EC2 instance with dry-run option. Returns True on success."""
     try:
         ec2.reboot_instances(InstanceIds=[instance_id], DryRun=dry_run)
         if dry_run:
             logging.info(f"Dry-run successful for rebooting instance {instance_id}.")
         else:
             logging.info(f"Instance {instance_id} rebooted.")
+        return True
     except ClientError as e:
         if 'DryRunOperation' in str(e):
             logging.info(f"Dry-run confirmed. Instance {instance_id} can be rebooted.")
+            return True
         elif 'UnauthorizedOperation' in str(e):
             logging.error(f"Unauthorized to reboot instance {instance_id}: {e}")
         else:
             logging.error(f"Error rebooting instance {instance_id}: {e}")
+        return False
+
+class CpuWindow:
+    """
+    Sliding window of the last WINDOW_POINTS datapoints for one instance.
+
+    Values and timestamps live in fixed-size array('d') ring buffers, so
+    thousands of instances cost a few hundred bytes each.
+    """
 
-def main(dry_run):
+    def __init__(self, size=WINDOW_POINTS, since=0.0):
+        self.values = array('d', [0.0] * size)
+        self.timestamps = array('d', [0.0] * size)
+        self.count = 0  # Total datapoints ever added
+        self.last_timestamp = since  # Datapoints at or before this are ignored
+
+    def add(self, timestamp, value):
+        """Add a datapoint unless it was already seen (cycles overlap)."""
+        if timestamp <= self.last_timestamp:
+            return False
+        slot = self.count % len(self.values)
+        self.values[slot] = value
+        self.timestamps[slot] = timestamp
+        self.count += 1
+        self.last_timestamp = timestamp
+        return True
+
+    def recent(self, n):
+        """The last n values, oldest first."""
+        n = min(n, self.count, len(self.values))
+        return [self.values[(self.count - n + i) % len(self.values)] for i in range(n)]
+
+    def sustained_breach(self, threshold, points=SUSTAINED_POINTS):
+        """True when each of the last `points` datapoints is above threshold."""
+        recent = self.recent(points)
+        return len(recent) == points and min(recent) > threshold
+
+class RebootController:
+    """
+    Long-running controller: keeps a CpuWindow per running instance and
+    reboots only on sustained breach, with a cap on reboots in flight and a
+    cooldown per instance.
+    """
+
+    def __init__(self, ec2, cloudwatch, threshold=CPU_THRESHOLD, window=WINDOW_POINTS,
+                 sustained=SUSTAINED_POINTS, max_concurrent=MAX_CONCURRENT_REBOOTS,
+                 cooldown=REBOOT_COOLDOWN, settle=REBOOT_SETTLE_SECONDS, dry_run=True):
+        self.ec2 = ec2
+        self.cloudwatch = cloudwatch
+        self.threshold = threshold
+        self.window = window
+        self.sustained = sustained
+        self.max_concurrent = max_concurrent
+        self.cooldown = cooldown
+        self.settle = settle
+        self.dry_run = dry_run
+        self.windows = {}       # instance ID -> CpuWindow
+        self.last_reboot = {}   # instance ID -> monotonic time of last reboot
+
+    def in_flight(self, now):
+        return sum(1 for t in self.last_reboot.values() if now - t < self.settle)
+
+    def collect(self):
+        """Refresh windows for the current fleet; forget instances that stopped running."""
+        instance_ids = get_running_instances(self.ec2)
+        for gone in self.windows.keys() - set(instance_ids):
+            del self.windows[gone]
+
+        # Overlapping lookback covers CloudWatch publishing lag; duplicates are skipped
+        series = get_cpu_series(self.cloudwatch, instance_ids, minutes=self.window * PERIOD_MINUTES)
+        for instance_id, points in series.items():
+            window = self.windows.setdefault(instance_id, CpuWindow(self.window))
+            for timestamp, value in points:
+                window.add(timestamp.timestamp(), value)
+
+    def candidates(self, now):
+        """Instances in sustained breach and out of cooldown, hottest first."""
+        breaching = []
+        for instance_id, window in self.windows.items():
+            if not window.sustained_breach(self.threshold, self.sustained):
+                continue
+            if now - self.last_reboot.get(instance_id, float('-inf')) < self.cooldown:
+                logging.info(f"Instance {instance_id} is breaching but in cooldown.")
+                continue
+            breaching.append((sum(window.recent(self.sustained)) / self.sustained, instance_id))
+        return [instance_id for _, instance_id in sorted(breaching, reverse=True)]
+
+    def run_cycle(self):
+        """One collect-and-act pass. Returns the instances rebooted."""
+        self.collect()
+        now = time.monotonic()
+        slots = self.max_concurrent - self.in_flight(now)
+        rebooted = []
+        for instance_id in self.candidates(now):
+            if len(rebooted) >= slots:
+                logging.warning(f"Reboot cap reached; deferring instance {instance_id}.")
+                continue
+            cpu = self.windows[instance_id].recent(1)[0]
+            logging.warning(f"Instance {instance_id} above {self.threshold}% for "
+                            f"{self.sustained} datapoints (latest {cpu:.2f}%).")
+            if reboot_instance(self.ec2, instance_id, dry_run=self.dry_run):
+                self.last_reboot[instance_id] = now
+                # Pre-reboot datapoints say nothing about the rebooted instance
+                self.windows[instance_id] = CpuWindow(self.window, since=self.windows[instance_id].last_timestamp)
+                rebooted.append(instance_id)
+
+        # Drop cooldown entries that can no longer matter
+        expired = [i for i, t in self.last_reboot.items() if now - t >= max(self.cooldown, self.settle)]
+        for instance_id in expired:
+            del self.last_reboot[instance_id]
+        return rebooted
+
+    def run(self, interval=CHECK_INTERVAL):
+        logging.info(f"Controller started: threshold {self.threshold}%, {self.sustained}/"
+                     f"{self.window} datapoints, max {self.max_concurrent} reboot(s) in flight.")
+        while True:
+            started = time.monotonic()
+            try:
+                rebooted = self.run_cycle()
+                logging.info(f"Cycle done in {time.monotonic() - started:.1f}s: "
+                             f"{len(self.windows)} instance(s) tracked, {len(rebooted)} rebooted.")
+            except (ClientError, BotoCoreError) as e:
+                logging.error(f"Controller cycle failed: {e}")
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+def main(dry_run, controller=False, interval=CHECK_INTERVAL, **controller_options):
     ec2 = boto3.client('ec2', region_name=REGION)
     cloudwatch = boto3.client('cloudwatch', region_name=REGION)
 
+    if controller:
+        RebootController(ec2, cloudwatch, dry_run=dry_run, **controller_options).run(interval)
+        return
+
     instance_ids = get_running_instances(ec2)
+    utilization = get_cpu_utilizations(cloudwatch, instance_ids)
     for instance_id in instance_ids:
-        cpu = get_cpu_utilization(cloudwatch, instance_id)
+        cpu = utilization[instance_id]
         if cpu > CPU_THRESHOLD:
             logging.warning(f"Instance {instance_id} exceeds CPU threshold: {cpu:.2f}%")
             reboot_instance(ec2, instance_id, dry_run=dry_run)
@@ -97,6 +318,22 @@ def main(dry_run):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Reboot EC2 instances with high CPU usage.")
     parser.add_argument('--dry-run', action='store_true', help="Perform a dry run without rebooting instances.")
+    parser.add_argument('--controller', action='store_true',
+                        help="Run continuously, rebooting only on sustained high CPU.")
+    parser.add_argument('--interval', type=int, default=CHECK_INTERVAL,
+                        help=f"Controller: seconds between cycles (default: {CHECK_INTERVAL}).")
+    parser.add_argument('--window', type=int, default=WINDOW_POINTS,
+                        help=f"Controller: datapoints kept per instance (default: {WINDOW_POINTS}).")
+    parser.add_argument('--sustained', type=int, default=SUSTAINED_POINTS,
+                        help=f"Controller: consecutive breaching datapoints before a reboot (default: {SUSTAINED_POINTS}).")
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT_REBOOTS,
+                        help=f"Controller: reboots allowed in flight (default: {MAX_CONCURRENT_REBOOTS}).")
+    parser.add_argument('--cooldown', type=int, default=REBOOT_COOLDOWN,
+                        help=f"Controller: seconds before an instance may be rebooted again (default: {REBOOT_COOLDOWN}).")
     args = parser.parse_args()
+    if args.sustained > args.window:
+        parser.error("--sustained cannot exceed --window")
 
-    main(dry_run=args.dry_run)
+    main(dry_run=args.dry_run, controller=args.controller, interval=args.interval,
+         window=args.window, sustained=args.sustained,
+         max_concurrent=args.max_concurrent, cooldown=args.cooldown)
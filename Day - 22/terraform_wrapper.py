@@ -1,22 +1,173 @@
+import argparse
+import codecs
+import hashlib
+import json
 import subprocess
 import shutil
 import os
+import queue
 import sys
-from typing import Optional, List, NamedTuple
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Generator, Optional, List, NamedTuple, TextIO, BinaryIO
 from datetime import datetime, timedelta
 
+READ_CHUNK_SIZE = 64 * 1024          # Bytes read from a pipe at a time
+DRAIN_GRACE_SECONDS = 5              # Wait for readers after a kill (grandchildren may hold pipes)
+PLAN_FILE_NAME = "plan.tfplan"
+PLAN_CACHE_KEEP = 5                  # Cached plans kept per working directory (newest first)
+PLAN_CACHE_INPUTS = (".tf", ".tf.json", ".tfvars", ".tfvars.json")  # Suffixes hashed into the fingerprint
+PLAN_CACHE_FILES = (".terraform.lock.hcl", "terraform.tfstate", os.path.join(".terraform", "environment"))
+MAX_OUTPUT_BYTES = 1024 * 1024       # Output kept in memory per stream (the tail)
+
 
 class TerraformResult(NamedTuple):
     return_code: int
     stdout: str
     stderr: str
     timed_out: bool = False
+    stdout_file: Optional[str] = None  # Full output, when spilling to disk
+    stderr_file: Optional[str] = None
+    plan_file: Optional[str] = None    # Saved plan (plan with caching enabled)
+    summary: Optional[dict] = None     # Parsed `terraform show -json` of the saved plan
+    cached: bool = False               # Plan was reused from the cache
+
+
+class TerraformEvent(NamedTuple):
+    """One line of terraform's `-json` machine-readable UI output."""
+    type: str                        # e.g. planned_change, apply_start, apply_complete, diagnostic, change_summary
+    message: str                     # Human-readable @message
+    level: str = "info"
+    address: Optional[str] = None    # Resource address for resource events
+    action: Optional[str] = None     # create/update/delete/replace/read/...
+    elapsed: Optional[float] = None  # Seconds, on apply_progress/apply_complete
+    data: Optional[dict] = None      # Type-specific payload: hook, change, changes, diagnostic, outputs
+    raw: Optional[dict] = None
+
+
+EVENT_PAYLOAD_KEYS = ("hook", "change", "changes", "diagnostic", "outputs")
+
+
+def parse_event(line: str) -> Optional[TerraformEvent]:
+    """Parse one `-json` output line; returns None for blank or non-JSON lines."""
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        raw = json.loads(line)
+    except ValueError:
+        return None
+
+    data = next((raw[key] for key in EVENT_PAYLOAD_KEYS if key in raw), None)
+    address = action = elapsed = None
+    if isinstance(data, dict):
+        resource = data.get("resource") or {}
+        address = resource.get("addr")
+        action = data.get("action")
+        elapsed = data.get("elapsed_seconds")
+    return TerraformEvent(
+        type=raw.get("type", "log"),
+        message=raw.get("@message", ""),
+        level=raw.get("@level", "info"),
+        address=address,
+        action=action,
+        elapsed=elapsed,
+        data=data,
+        raw=raw,
+    )
+
+
+class OutputBuffer:
+    """
+    Keeps the last `max_bytes` of a stream in memory as a deque of chunks,
+    and optionally writes the complete stream to `spill_path`.
+    """
+
+    def __init__(self, max_bytes: int = MAX_OUTPUT_BYTES, spill_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.chunks = deque()
+        self.size = 0
+        self.dropped = 0
+        self._spill = open(spill_path, "w", encoding="utf-8") if spill_path else None
+
+    def write(self, text: str) -> None:
+        if self._spill:
+            self._spill.write(text)
+        self.chunks.append(text)
+        self.size += len(text)
+        # Drop from the front until the tail fits again
+        while self.size > self.max_bytes:
+            excess = self.size - self.max_bytes
+            head = self.chunks[0]
+            if len(head) <= excess:
+                self.chunks.popleft()
+                removed = len(head)
+            else:
+                self.chunks[0] = head[excess:]
+                removed = excess
+            self.size -= removed
+            self.dropped += removed
+
+    def getvalue(self) -> str:
+        text = ''.join(self.chunks)
+        if not self.dropped:
+            return text
+        where = f", full output in {self.spill_path}" if self.spill_path else ""
+        return f"[... {self.dropped} characters truncated{where} ...]\n" + text
+
+    def close(self) -> None:
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+
+def _drain_pipe(pipe: BinaryIO, buffer: OutputBuffer, echo: Optional[TextIO],
+                on_line: Optional[Callable[[str], None]] = None) -> None:
+    """
+    Read a pipe in large chunks until EOF, echoing and buffering decoded text.
+    If `on_line` is given it is also called with every complete line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    with pipe:
+        while True:
+            chunk = pipe.read1(READ_CHUNK_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                if echo:
+                    echo.write(text)
+                    echo.flush()
+                buffer.write(text)
+            if on_line:
+                *lines, partial = (partial + text).split("\n")
+                if not chunk and partial:
+                    lines.append(partial)
+                for line in lines:
+                    try:
+                        on_line(line)
+                    except Exception as e:  # a failing consumer must not stop the pipe draining
+                        print(f"Warning: output callback failed: {e}", file=sys.stderr)
+            if not chunk:
+                break
 
 
 class TerraformWrapper:
-    def __init__(self, working_dir: str, timeout_minutes: int = 10):
+    def __init__(self, working_dir: str, timeout_minutes: int = 10,
+                 max_output_bytes: int = MAX_OUTPUT_BYTES, spill_dir: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None, echo: bool = True,
+                 plan_cache_dir: Optional[str] = None):
         self.working_dir = os.path.abspath(working_dir)
         self.timeout = timedelta(minutes=timeout_minutes)
+        self.max_output_bytes = max_output_bytes  # Per stream, kept in memory
+        self.spill_dir = spill_dir  # If set, full output of each command is also written here
+        self.env = env or {}  # Extra environment variables for terraform
+        self.echo = echo  # Print output live (turn off when running many stacks at once)
+        # If set, plans are saved and reused by input fingerprint. Made absolute
+        # because terraform runs in working_dir and gets the -out path from us.
+        self.plan_cache_dir = os.path.abspath(plan_cache_dir) if plan_cache_dir else None
         self._validate_working_dir()
         self._validate_terraform_installed()
         
@@ -36,11 +187,20 @@ class TerraformWrapper:
         self,
         command: str,
         args: Optional[List[str]] = None,
-        var_file: Optional[str] = None
+        var_file: Optional[str] = None,
+        on_event: Optional[Callable[[TerraformEvent], Any]] = None
     ) -> TerraformResult:
+        """
+        Run one terraform command. With `on_event`, terraform runs with `-json`
+        and each output line is parsed into a TerraformEvent and passed to the
+        callback as it arrives (from a reader thread); echo then shows only the
+        human-readable message of each event.
+        """
         if args is None:
             args = []
             
+        if on_event and "-json" not in args:
+            args = ["-json"] + args  # flags must precede a positional plan file
         cmd = ["terraform", command] + args
         
         if var_file:
@@ -48,96 +208,474 @@ class TerraformWrapper:
                 raise FileNotFoundError(f"Var file not found: {var_file}")
             cmd.extend(["-var-file", var_file])
         
-        stdout_lines = []
-        stderr_lines = []
+        stdout_buffer = OutputBuffer(self.max_output_bytes, self._spill_path(command, "stdout"))
+        stderr_buffer = OutputBuffer(self.max_output_bytes, self._spill_path(command, "stderr"))
         process = None
         timed_out = False
-        
+        error = None
+
         try:
-            start_time = datetime.now()
             process = subprocess.Popen(
                 cmd,
                 cwd=self.working_dir,
+                env={**os.environ, **self.env},
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
-            
-            # Read output while process is running
-            while True:
-                # Check timeout
-                if datetime.now() - start_time > self.timeout:
-                    process.kill()
-                    timed_out = True
-                    raise TimeoutError(f"Command timed out after {self.timeout}")
-                
-                # Try to read output
-                stdout_line = process.stdout.readline()
-                stderr_line = process.stderr.readline()
-                
-                if stdout_line:
-                    print(stdout_line, end='')
-                    stdout_lines.append(stdout_line)
-                
-                if stderr_line:
-                    print(stderr_line, end='', file=sys.stderr)
-                    stderr_lines.append(stderr_line)
-                
-                # Check if process has completed
-                if process.poll() is not None:
-                    break
-                    
-            # Get remaining output
-            remaining_stdout, remaining_stderr = process.communicate()
-            if remaining_stdout:
-                print(remaining_stdout, end='')
-                stdout_lines.append(remaining_stdout)
-            if remaining_stderr:
-                print(remaining_stderr, end='', file=sys.stderr)
-                stderr_lines.append(remaining_stderr)
-                    
-        except TimeoutError as e:
-            return TerraformResult(
-                return_code=1,
-                stdout=''.join(stdout_lines),
-                stderr=''.join(stderr_lines) + f"\nERROR: {str(e)}",
-                timed_out=True
             )
+            # One reader thread per pipe, so neither can fill up while we wait on the other
+            on_line = self._event_line_handler(on_event) if on_event else None
+            readers = [
+                threading.Thread(target=_drain_pipe, daemon=True, args=(
+                    process.stdout, stdout_buffer, sys.stdout if self.echo and not on_event else None, on_line)),
+                threading.Thread(target=_drain_pipe, args=(process.stderr, stderr_buffer, sys.stderr if self.echo else None), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+
+            try:
+                process.wait(timeout=self.timeout.total_seconds())
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                timed_out = True
+                error = f"\nERROR: Command timed out after {self.timeout}"
+            for reader in readers:
+                reader.join(DRAIN_GRACE_SECONDS if timed_out else None)
         except Exception as e:
-            if process:
+            if process and process.poll() is None:
                 process.kill()
-            return TerraformResult(
-                return_code=1,
-                stdout=''.join(stdout_lines),
-                stderr=''.join(stderr_lines) + f"\nError: {str(e)}",
-                timed_out=timed_out
-            )
-        
+            error = f"\nError: {str(e)}"
+        finally:
+            stdout_buffer.close()
+            stderr_buffer.close()
+
         return TerraformResult(
-            return_code=process.returncode if process else 1,
-            stdout=''.join(stdout_lines),
-            stderr=''.join(stderr_lines),
-            timed_out=timed_out
+            return_code=process.returncode if process and error is None else 1,
+            stdout=stdout_buffer.getvalue(),
+            stderr=stderr_buffer.getvalue() + (error or ''),
+            timed_out=timed_out,
+            stdout_file=stdout_buffer.spill_path,
+            stderr_file=stderr_buffer.spill_path,
         )
 
+    def _event_line_handler(self, on_event: Callable[[TerraformEvent], Any]) -> Callable[[str], None]:
+        def handle(line: str) -> None:
+            event = parse_event(line)
+            if event is None:
+                return
+            if self.echo and event.message:
+                print(event.message, file=sys.stderr if event.level == "error" else sys.stdout, flush=True)
+            on_event(event)
+        return handle
+
+    def stream_events(self, command: str, args: Optional[List[str]] = None,
+                      var_file: Optional[str] = None) -> Generator[TerraformEvent, None, TerraformResult]:
+        """
+        Run a command with `-json` and yield TerraformEvents as they arrive.
+
+        The TerraformResult is the generator's return value
+        (`result = yield from tf.stream_events("plan")`). Terraform keeps running
+        to completion even if the consumer stops iterating early.
+        """
+        events: "queue.Queue" = queue.Queue()
+        done = object()
+        outcome = {}
+
+        def run() -> None:
+            try:
+                outcome["result"] = self._run_terraform_command(command, args=args, var_file=var_file,
+                                                                on_event=events.put)
+            finally:
+                events.put(done)
+
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            event = events.get()
+            if event is done:
+                return outcome.get("result", TerraformResult(1, "", "Error: terraform runner failed"))
+            yield event
+
+    def _spill_path(self, command: str, stream: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        os.makedirs(self.spill_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return os.path.join(self.spill_dir, f"{command}-{stamp}.{stream}.log")
+
     def init(self, **kwargs) -> TerraformResult:
         return self._run_terraform_command("init", **kwargs)
 
-    def plan(self, var_file: Optional[str] = None, extra_args: Optional[List[str]] = None) -> TerraformResult:
-        args = extra_args if extra_args else []
+    def plan(self, var_file: Optional[str] = None, extra_args: Optional[List[str]] = None,
+             on_event: Optional[Callable[[TerraformEvent], Any]] = None) -> TerraformResult:
+        args = list(extra_args) if extra_args else []
         args.extend(["-refresh=false", "-lock=false"])  # Disable refresh and locking
-        return self._run_terraform_command("plan", args=args, var_file=var_file)
+        if on_event and "-json" not in args:
+            args.insert(0, "-json")
+        if not self.plan_cache_dir:
+            return self._run_terraform_command("plan", args=args, var_file=var_file, on_event=on_event)
+
+        entry = os.path.join(self.plan_cache_dir, self.plan_fingerprint(var_file, args))
+        cached = self._load_cached_plan(entry)
+        if cached:
+            if on_event:
+                # Replay the saved -json output so consumers see the same events
+                for line in cached.stdout.splitlines():
+                    event = parse_event(line)
+                    if event:
+                        on_event(event)
+            elif self.echo:
+                print(cached.stdout, end='')
+            if self.echo:
+                print(f"Reusing cached plan: {cached.plan_file}")
+            return cached
+
+        # Plan into a scratch directory and publish it with one rename, so a
+        # concurrent or interrupted run never sees a half-written entry
+        os.makedirs(self.plan_cache_dir, exist_ok=True)
+        scratch = f"{entry}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(scratch, exist_ok=True)
+        try:
+            plan_file = os.path.join(scratch, PLAN_FILE_NAME)
+            result = self._run_terraform_command("plan", args=args + ["-out", plan_file], var_file=var_file,
+                                                 on_event=on_event)
+            if result.return_code != 0:
+                return result
+            try:
+                summary = self._show_plan(plan_file)
+            except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+                # The plan itself succeeded; keep it, just without a summary
+                print(f"Warning: could not summarise plan: {e}", file=sys.stderr)
+                summary = None
+            with open(os.path.join(scratch, "summary.json"), "w") as f:
+                json.dump(summary, f)
+            with open(os.path.join(scratch, "stdout.txt"), "w", encoding="utf-8") as f:
+                f.write(result.stdout)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(scratch, entry)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        self._prune_plan_cache()
+        return result._replace(plan_file=os.path.join(entry, PLAN_FILE_NAME), summary=summary)
+
+    def plan_fingerprint(self, var_file: Optional[str], args: List[str]) -> str:
+        """
+        sha256 over everything that decides the plan: configuration and var
+        files under the working dir, the var file, the dependency lock file,
+        local state and workspace, TF_VAR_* variables and the plan arguments.
+        Remote state is not covered.
+        """
+        digest = hashlib.sha256()
+
+        def add_file(label: str, path: str) -> None:
+            digest.update(label.encode() + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(block)
+            except FileNotFoundError:
+                digest.update(b"<missing>")
+            digest.update(b"\0")
+
+        for root, dirs, files in os.walk(self.working_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))  # skips .terraform, .git
+            for name in sorted(files):
+                if name.endswith(PLAN_CACHE_INPUTS):
+                    path = os.path.join(root, name)
+                    add_file(os.path.relpath(path, self.working_dir), path)
+        for name in PLAN_CACHE_FILES:
+            add_file(name, os.path.join(self.working_dir, name))
+        if var_file:
+            add_file("var-file", var_file)
+
+        env = {**os.environ, **self.env}
+        variables = sorted((k, v) for k, v in env.items() if k.startswith("TF_VAR_") or k == "TF_WORKSPACE")
+        digest.update(json.dumps([variables, args]).encode())
+        return digest.hexdigest()
+
+    def _load_cached_plan(self, entry: str) -> Optional[TerraformResult]:
+        plan_file = os.path.join(entry, PLAN_FILE_NAME)
+        try:
+            with open(os.path.join(entry, "summary.json")) as f:
+                summary = json.load(f)
+            with open(os.path.join(entry, "stdout.txt"), encoding="utf-8") as f:
+                stdout = f.read()
+        except (OSError, ValueError):
+            return None
+        if not os.path.isfile(plan_file):
+            return None
+        return TerraformResult(return_code=0, stdout=stdout, stderr="", plan_file=plan_file,
+                               summary=summary, cached=True)
+
+    def _prune_plan_cache(self) -> None:
+        entries = [os.path.join(self.plan_cache_dir, name) for name in os.listdir(self.plan_cache_dir)
+                   if ".tmp-" not in name]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[PLAN_CACHE_KEEP:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def _show_plan(self, plan_file: str) -> dict:
+        """Summarise `terraform show -json` of a saved plan: counts plus changed resources."""
+        completed = subprocess.run(
+            ["terraform", "show", "-json", plan_file],
+            cwd=self.working_dir, env={**os.environ, **self.env},
+            capture_output=True, text=True, timeout=self.timeout.total_seconds(),
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"terraform show failed: {completed.stderr.strip()}")
+        plan = json.loads(completed.stdout)
+
+        summary = {"add": 0, "change": 0, "destroy": 0, "resources": []}
+        for change in plan.get("resource_changes", []):
+            actions = change.get("change", {}).get("actions", [])
+            if actions in (["no-op"], ["read"]):
+                continue
+            summary["add"] += "create" in actions
+            summary["change"] += "update" in actions
+            summary["destroy"] += "delete" in actions
+            summary["resources"].append({"address": change.get("address"), "actions": actions})
+        return summary
+
+    def discard_plan(self, plan_file: Optional[str]) -> None:
+        """Drop a cached plan (e.g. once it has been applied and is stale)."""
+        if not (plan_file and self.plan_cache_dir):
+            return
+        entry = os.path.dirname(os.path.abspath(plan_file))
+        if entry != self.plan_cache_dir and \
+                os.path.commonpath([entry, self.plan_cache_dir]) == self.plan_cache_dir:
+            shutil.rmtree(entry, ignore_errors=True)
 
     def apply(self, auto_approve: bool = True, var_file: Optional[str] = None, 
-              extra_args: Optional[List[str]] = None) -> TerraformResult:
-        args = extra_args if extra_args else []
+              extra_args: Optional[List[str]] = None, plan_file: Optional[str] = None,
+              on_event: Optional[Callable[[TerraformEvent], Any]] = None) -> TerraformResult:
+        args = list(extra_args) if extra_args else []
+        if plan_file:
+            # A saved plan already carries its variables and needs no approval
+            result = self._run_terraform_command("apply", args=args + [plan_file], on_event=on_event)
+            self.discard_plan(plan_file)
+            return result
         if auto_approve:
             args.append("-auto-approve")
-        return self._run_terraform_command("apply", args=args, var_file=var_file)
+        return self._run_terraform_command("apply", args=args, var_file=var_file, on_event=on_event)
+
+
+class StackReport(NamedTuple):
+    name: str
+    status: str                 # 'ok', 'failed' or 'skipped'
+    timings: Dict[str, float]   # step -> seconds
+    result: Optional[TerraformResult] = None  # Result of the last step that ran
+
+
+class TerraformOrchestrator:
+    """
+    Runs init/plan/apply over many stacks (working directories) that may depend
+    on each other.
+
+    A stack starts as soon as every stack it depends on has finished the same
+    phase, with at most `max_parallel` stacks running at once. Apply therefore
+    follows topological order. If a stack fails, its dependents are skipped.
+
+    All stacks share TF_PLUGIN_CACHE_DIR, so each provider is downloaded once.
+    Terraform's plugin cache is not safe for concurrent writes, so `init` steps
+    are serialized. They are quick once the cache is warm; plans run in parallel.
+    """
+
+    def __init__(self, stacks: Dict[str, str], depends_on: Optional[Dict[str, List[str]]] = None,
+                 max_parallel: int = 4, plugin_cache_dir: Optional[str] = None,
+                 timeout_minutes: int = 10, var_files: Optional[Dict[str, str]] = None,
+                 spill_dir: Optional[str] = None, plan_cache: bool = False):
+        self.depends_on = {name: list((depends_on or {}).get(name, [])) for name in stacks}
+        self.order = self._topological_order()
+        self.max_parallel = max_parallel
+        self.var_files = var_files or {}
+        self.plugin_cache_dir = os.path.abspath(
+            plugin_cache_dir or os.path.join(os.path.expanduser("~"), ".terraform.d", "plugin-cache"))
+        os.makedirs(self.plugin_cache_dir, exist_ok=True)
+        self._init_lock = threading.Lock()
+        self.wrappers = {
+            name: TerraformWrapper(
+                working_dir, timeout_minutes=timeout_minutes, echo=False,
+                spill_dir=os.path.join(spill_dir, name) if spill_dir else None,
+                env={"TF_PLUGIN_CACHE_DIR": self.plugin_cache_dir, "TF_IN_AUTOMATION": "1"},
+                plan_cache_dir=os.path.join(working_dir, ".terraform", "plan-cache") if plan_cache else None,
+            )
+            for name, working_dir in stacks.items()
+        }
+
+    def _topological_order(self) -> List[str]:
+        """Kahn's algorithm; raises ValueError on unknown dependencies or cycles."""
+        for name, deps in self.depends_on.items():
+            unknown = [d for d in deps if d not in self.depends_on]
+            if unknown:
+                raise ValueError(f"Stack '{name}' depends on unknown stack(s): {', '.join(unknown)}")
+
+        remaining = {name: len(deps) for name, deps in self.depends_on.items()}
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for other, deps in self.depends_on.items():
+                if name in deps:
+                    remaining[other] -= 1
+                    if remaining[other] == 0:
+                        ready.append(other)
+        if len(order) != len(self.depends_on):
+            cycle = sorted(set(self.depends_on) - set(order))
+            raise ValueError(f"Dependency cycle between stacks: {', '.join(cycle)}")
+        return order
+
+    def _run_graph(self, phase: str, steps: Callable[[str], StackReport]) -> Dict[str, StackReport]:
+        """Run `steps` for every stack once its dependencies succeeded in this phase."""
+        reports: Dict[str, StackReport] = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while len(reports) < len(self.order):
+                for name in self.order:
+                    if name in reports or name in running.values():
+                        continue
+                    deps = self.depends_on[name]
+                    if any(d in reports and reports[d].status != "ok" for d in deps):
+                        reports[name] = StackReport(name, "skipped", {})
+                        print(f"[{name}] {phase} skipped: a dependency did not succeed")
+                    elif all(d in reports for d in deps):
+                        running[executor.submit(steps, name)] = name
+                if not running:
+                    continue  # only skips were recorded; rescan
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        reports[name] = future.result()
+                    except Exception as e:
+                        reports[name] = StackReport(name, "failed", {}, TerraformResult(1, "", str(e)))
+                    report = reports[name]
+                    if report.status == "skipped":
+                        print(f"[{name}] {phase} skipped")
+                    else:
+                        print(f"[{name}] {phase} {report.status} in {sum(report.timings.values()):.1f}s")
+        return reports
+
+    def _run_steps(self, name: str, steps: List[Callable[[TerraformWrapper], TerraformResult]],
+                   labels: List[str]) -> StackReport:
+        wrapper = self.wrappers[name]
+        timings = {}
+        result = None
+        for label, step in zip(labels, steps):
+            started = time.monotonic()
+            result = step(wrapper)
+            timings[label] = time.monotonic() - started
+            if result.return_code != 0:
+                return StackReport(name, "failed", timings, result)
+        return StackReport(name, "ok", timings, result)
+
+    def _locked_init(self, wrapper: TerraformWrapper) -> TerraformResult:
+        with self._init_lock:
+            return wrapper.init(args=["-input=false"])
+
+    def plan_all(self) -> Dict[str, StackReport]:
+        """Run init and plan for every stack, independent stacks in parallel."""
+        return self._run_graph("plan", lambda name: self._run_steps(
+            name,
+            [self._locked_init, lambda tf: tf.plan(var_file=self.var_files.get(name))],
+            ["init", "plan"],
+        ))
+
+    def apply_all(self, plans: Optional[Dict[str, StackReport]] = None) -> Dict[str, StackReport]:
+        """
+        Apply stacks in dependency order; stacks whose plan failed are skipped.
+        Saved plans are applied only for stacks without dependencies; the rest re-plan.
+        """
+        plans = plans or {}
+
+        def apply(name: str) -> StackReport:
+            if name in plans and plans[name].status != "ok":
+                return StackReport(name, "skipped", {})
+            plan_result = plans[name].result if name in plans else None
+            plan_file = plan_result.plan_file if plan_result else None
+            if plan_file and self.depends_on[name]:
+                # Planned before its dependencies were applied, so any remote state
+                # or data sources it read may be stale: apply with a fresh plan
+                self.wrappers[name].discard_plan(plan_file)
+                plan_file = None
+            return self._run_steps(
+                name,
+                [lambda tf: tf.apply(var_file=self.var_files.get(name), extra_args=["-input=false"],
+                                     plan_file=plan_file)],
+                ["apply"],
+            )
+        return self._run_graph("apply", apply)
+
+    @staticmethod
+    def print_report(*phases: Dict[str, StackReport]) -> None:
+        """Print per-stack status and step timings."""
+        names = list(phases[0]) if phases else []
+        print(f"\n{'STACK':<30} {'STATUS':<8} {'INIT':>8} {'PLAN':>8} {'APPLY':>8}")
+        for name in names:
+            timings = {}
+            status = "ok"
+            for reports in phases:
+                report = reports.get(name)
+                if report:
+                    timings.update(report.timings)
+                    if status == "ok" and report.status != "ok":
+                        status = report.status  # the first phase that did not succeed
+            cells = [f"{timings[step]:.1f}s" if step in timings else "-" for step in ("init", "plan", "apply")]
+            print(f"{name:<30} {status:<8} {cells[0]:>8} {cells[1]:>8} {cells[2]:>8}")
+
+
+def run_stacks(stacks_file: str, max_parallel: int, apply: bool, spill_dir: Optional[str],
+               plan_cache: bool = False) -> int:
+    """
+    Plan (and optionally apply) every stack listed in a JSON file:
+
+        {"stacks": {"network": "stacks/network", "app": "stacks/app"},
+         "depends_on": {"app": ["network"]},
+         "var_files": {"app": "stacks/app/prod.tfvars"},
+         "plugin_cache_dir": ".terraform-plugin-cache"}
+
+    Relative paths are resolved from the file's directory. Returns an exit code.
+    """
+    with open(stacks_file) as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(stacks_file))
+    resolve = lambda path: os.path.join(base, path)
+
+    orchestrator = TerraformOrchestrator(
+        {name: resolve(path) for name, path in config["stacks"].items()},
+        depends_on=config.get("depends_on"),
+        max_parallel=max_parallel,
+        plugin_cache_dir=resolve(config["plugin_cache_dir"]) if config.get("plugin_cache_dir") else None,
+        var_files={name: resolve(path) for name, path in config.get("var_files", {}).items()},
+        spill_dir=spill_dir,
+        plan_cache=plan_cache,
+    )
+    plans = orchestrator.plan_all()
+    phases = [plans]
+    if apply:
+        phases.append(orchestrator.apply_all(plans))
+    orchestrator.print_report(*phases)
+    return 0 if all(r.status == "ok" for reports in phases for r in reports.values()) else 1
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run terraform init/plan/apply with timeout protection.")
+    parser.add_argument("--stacks-file", help="JSON file describing many stacks and their dependencies")
+    parser.add_argument("--parallel", type=int, default=4, help="Stacks run at once (default: 4)")
+    parser.add_argument("--apply", action="store_true", help="With --stacks-file: apply after a successful plan")
+    parser.add_argument("--log-dir", help="With --stacks-file: write each stack's full output here")
+    parser.add_argument("--json", action="store_true",
+                        help="Run plan/apply with -json and print structured progress instead of raw output")
+    parser.add_argument("--plan-cache", action="store_true",
+                        help="Save plans and reuse them while the configuration, var file and lock file are unchanged")
+    cli_args = parser.parse_args()
+    if cli_args.stacks_file:
+        try:
+            sys.exit(run_stacks(cli_args.stacks_file, cli_args.parallel, cli_args.apply, cli_args.log_dir,
+                                plan_cache=cli_args.plan_cache))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"\nError: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
     try:
         # Get the directory where this script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -147,7 +685,10 @@ if __name__ == "__main__":
         print(f"Using Terraform directory: {tf_dir}")
         
         # Initialize with 10 minute timeout (reduced from 30)
-        tf = TerraformWrapper(tf_dir, timeout_minutes=10)
+        tf = TerraformWrapper(
+            tf_dir, timeout_minutes=10,
+            plan_cache_dir=os.path.join(tf_dir, ".terraform", "plan-cache") if cli_args.plan_cache else None,
+        )
         
         print("Running terraform init...")
         init_result = tf.init()
@@ -157,7 +698,11 @@ if __name__ == "__main__":
             sys.exit(1)
             
         print("Running terraform plan with disabled refresh...")
-        plan_result = tf.plan()
+        # With --json, keep diagnostics as structured events instead of regex-parsing stderr
+        diagnostics = []
+        collect = (lambda event: diagnostics.append(event) if event.type == "diagnostic" else None) \
+            if cli_args.json else None
+        plan_result = tf.plan(on_event=collect)
         
         if plan_result.timed_out:
             print("\nERROR: Terraform plan timed out after 10 minutes!", file=sys.stderr)
@@ -169,13 +714,23 @@ if __name__ == "__main__":
             sys.exit(1)
             
         if plan_result.return_code == 0:
+            if plan_result.summary:
+                summary = plan_result.summary
+                print(f"\nPlan{' (cached)' if plan_result.cached else ''}: {summary['add']} to add, "
+                      f"{summary['change']} to change, {summary['destroy']} to destroy.")
             print("\nPlan succeeded. Would you like to apply? (y/n)")
             if input().lower() == 'y':
                 print("Running terraform apply...")
-                apply_result = tf.apply()
+                apply_result = tf.apply(plan_file=plan_result.plan_file, on_event=collect)
                 print(f"\nApply completed with return code: {apply_result.return_code}")
             else:
                 print("Apply cancelled by user")
+        elif diagnostics:
+            print("\nPlan failed:", file=sys.stderr)
+            for event in diagnostics:
+                detail = event.data.get("detail", "") if event.data else ""
+                print(f"  [{event.level}] {event.message} {detail}".rstrip(), file=sys.stderr)
+            sys.exit(1)
         else:
             print(f"\nPlan failed: {plan_result.stderr}", file=sys.stderr)
             sys.exit(1)
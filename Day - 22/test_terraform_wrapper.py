@@ -0,0 +1,266 @@
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from terraform_wrapper import (PLAN_FILE_NAME, OutputBuffer, TerraformOrchestrator, TerraformWrapper,
+                               parse_event)
+
+# Stand-in for the terraform binary: logs "<stack dir> <args>" to FAKE_TF_LOG,
+# writes -out plan files and fails any command whose stack is in FAKE_TF_FAIL
+FAKE_TERRAFORM = f"""#!{sys.executable}
+import json, os, sys
+stack = os.path.basename(os.getcwd())
+with open(os.environ["FAKE_TF_LOG"], "a") as log:
+    log.write(stack + " " + " ".join(sys.argv[1:]) + "\\n")
+if stack in os.environ.get("FAKE_TF_FAIL", "").split(","):
+    print("Error: " + stack + " failed", file=sys.stderr)
+    sys.exit(1)
+if sys.argv[1] == "show":
+    print(json.dumps({{"resource_changes": [
+        {{"address": "null_resource.a", "change": {{"actions": ["create"]}}}},
+        {{"address": "null_resource.b", "change": {{"actions": ["no-op"]}}}},
+    ]}}))
+    sys.exit(0)
+if "-out" in sys.argv:
+    with open(sys.argv[sys.argv.index("-out") + 1], "w") as plan:
+        plan.write("plan")
+if "-json" in sys.argv:
+    # Machine-readable UI, flushed in small pieces that split lines
+    events = [
+        {{"type": "version", "@message": "Terraform 1.8.0"}},
+        {{"type": "planned_change", "@message": "null_resource.a: Plan to create",
+          "change": {{"resource": {{"addr": "null_resource.a"}}, "action": "create"}}}},
+        {{"type": "change_summary", "@message": "Plan: 1 to add, 0 to change, 0 to destroy.",
+          "changes": {{"add": 1, "change": 0, "remove": 0}}}},
+    ]
+    text = "".join(json.dumps(event) + "\\n" for event in events)
+    for start in range(0, len(text), 7):
+        sys.stdout.write(text[start:start + 7])
+        sys.stdout.flush()
+    sys.exit(0)
+print(sys.argv[1] + " done")
+"""
+
+
+@unittest.skipIf(os.name == "nt", "the fake terraform binary is a POSIX script")
+class FakeTerraformTestCase(unittest.TestCase):
+    """Runs each test in a scratch directory with a fake terraform first on PATH."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        bin_dir = os.path.join(self.root, "bin")
+        os.makedirs(bin_dir)
+        terraform = os.path.join(bin_dir, "terraform")
+        with open(terraform, "w") as f:
+            f.write(FAKE_TERRAFORM)
+        os.chmod(terraform, os.stat(terraform).st_mode | stat.S_IXUSR)
+
+        self.log = os.path.join(self.root, "calls.log")
+        env = mock.patch.dict(os.environ, {
+            "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+            "FAKE_TF_LOG": self.log,
+            "FAKE_TF_FAIL": "",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+
+    def make_stack(self, name, config='resource "null_resource" "a" {}\n'):
+        path = os.path.join(self.root, "stacks", name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "main.tf"), "w") as f:
+            f.write(config)
+        return path
+
+    def calls(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as f:
+            return [line.split()[:2] for line in f]
+
+
+class TestPlanCache(FakeTerraformTestCase):
+    def test_relative_cache_dir_reuses_plans(self):
+        self.make_stack("a")
+        tf = TerraformWrapper(os.path.join("stacks", "a"), echo=False,
+                              plan_cache_dir=os.path.join("stacks", "a", ".terraform", "plan-cache"))
+
+        first = tf.plan()
+        second = tf.plan()
+
+        self.assertEqual(first.return_code, 0)
+        self.assertTrue(os.path.isabs(first.plan_file))
+        self.assertTrue(os.path.isfile(first.plan_file))
+        self.assertEqual(os.path.basename(first.plan_file), PLAN_FILE_NAME)
+        self.assertEqual(first.summary["add"], 1)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.plan_file, first.plan_file)
+        self.assertEqual([call for call in self.calls() if call[1] == "plan"], [["a", "plan"]])
+
+    def test_discard_plan_only_removes_cache_entries(self):
+        path = self.make_stack("a")
+        tf = TerraformWrapper(path, echo=False, plan_cache_dir=os.path.join(path, "cache"))
+        plan_file = tf.plan().plan_file
+        # A sibling directory that merely shares the cache dir's name prefix
+        outside = os.path.join(path, "cache-other", PLAN_FILE_NAME)
+        os.makedirs(os.path.dirname(outside))
+        open(outside, "w").close()
+
+        tf.discard_plan(outside)
+        tf.discard_plan(plan_file)
+
+        self.assertTrue(os.path.exists(outside))
+        self.assertFalse(os.path.exists(os.path.dirname(plan_file)))
+
+
+class TestStreamEvents(FakeTerraformTestCase):
+    def test_events_arrive_parsed_from_split_output(self):
+        tf = TerraformWrapper(self.make_stack("a"), echo=False)
+        stream = tf.stream_events("plan")
+        events = []
+        while True:
+            try:
+                events.append(next(stream))
+            except StopIteration as done:
+                result = done.value
+                break
+
+        self.assertEqual([event.type for event in events], ["version", "planned_change", "change_summary"])
+        self.assertEqual(events[1].address, "null_resource.a")
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(self.calls(), [["a", "plan"]])
+        self.assertIn("-json", open(self.log).read())
+
+
+class TestOrchestrator(FakeTerraformTestCase):
+    DEPENDS_ON = {"db": ["network"], "app": ["db", "network"], "dns": []}
+
+    def orchestrator(self, **kwargs):
+        stacks = {name: self.make_stack(name) for name in ("app", "db", "dns", "network")}
+        return TerraformOrchestrator(stacks, depends_on=self.DEPENDS_ON,
+                                     plugin_cache_dir=os.path.join(self.root, "plugins"), **kwargs)
+
+    def test_topological_order(self):
+        order = self.orchestrator().order
+
+        self.assertEqual(sorted(order), ["app", "db", "dns", "network"])
+        for name, deps in self.DEPENDS_ON.items():
+            for dep in deps:
+                self.assertLess(order.index(dep), order.index(name))
+
+    def test_rejects_cycles_and_unknown_dependencies(self):
+        with self.assertRaisesRegex(ValueError, "cycle.*a, b"):
+            TerraformOrchestrator({"a": "a", "b": "b", "c": "c"}, depends_on={"a": ["b"], "b": ["a"]})
+        with self.assertRaisesRegex(ValueError, "unknown stack.*missing"):
+            TerraformOrchestrator({"a": "a"}, depends_on={"a": ["missing"]})
+
+    def test_plans_follow_dependencies(self):
+        reports = self.orchestrator(max_parallel=4).plan_all()
+
+        self.assertEqual({name: report.status for name, report in reports.items()},
+                         dict.fromkeys(["app", "db", "dns", "network"], "ok"))
+        plans = [stack for stack, command in self.calls() if command == "plan"]
+        for name, deps in self.DEPENDS_ON.items():
+            for dep in deps:
+                self.assertLess(plans.index(dep), plans.index(name))
+        self.assertEqual(set(reports["app"].timings), {"init", "plan"})
+
+    def test_failed_stack_skips_its_dependents(self):
+        os.environ["FAKE_TF_FAIL"] = "db"
+        orchestrator = self.orchestrator()
+        plans = orchestrator.plan_all()
+        applies = orchestrator.apply_all(plans)
+
+        self.assertEqual({name: report.status for name, report in plans.items()},
+                         {"network": "ok", "dns": "ok", "db": "failed", "app": "skipped"})
+        self.assertEqual(applies["app"].status, "skipped")
+        self.assertEqual(applies["db"].status, "skipped")
+        self.assertEqual(sorted(stack for stack, command in self.calls() if command == "apply"),
+                         ["dns", "network"])
+        self.assertNotIn(["app", "plan"], self.calls())
+
+
+class TestPlanFingerprint(FakeTerraformTestCase):
+    def test_changes_only_with_plan_inputs(self):
+        path = self.make_stack("a")
+        tf = TerraformWrapper(path, echo=False)
+        base = tf.plan_fingerprint(None, [])
+
+        os.makedirs(os.path.join(path, ".terraform"))
+        with open(os.path.join(path, ".terraform", "ignored.tf"), "w") as f:
+            f.write("# provider cache, not configuration\n")
+        with open(os.path.join(path, "notes.md"), "w") as f:
+            f.write("not an input\n")
+        self.assertEqual(tf.plan_fingerprint(None, []), base)
+
+        self.assertNotEqual(tf.plan_fingerprint(None, ["-target=a"]), base)
+        with mock.patch.dict(os.environ, {"TF_VAR_region": "eu-west-1"}):
+            self.assertNotEqual(tf.plan_fingerprint(None, []), base)
+        with open(os.path.join(path, "main.tf"), "a") as f:
+            f.write('resource "null_resource" "b" {}\n')
+        self.assertNotEqual(tf.plan_fingerprint(None, []), base)
+
+
+class TestOutputBuffer(unittest.TestCase):
+    def test_keeps_the_tail_and_spills_everything(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spill = os.path.join(tmp, "plan.stdout.log")
+            buffer = OutputBuffer(max_bytes=10, spill_path=spill)
+            for text in ("0123", "456789", "abcdef", "g"):
+                buffer.write(text)
+            buffer.close()
+
+            self.assertEqual(buffer.size, 10)
+            self.assertEqual(buffer.dropped, 7)
+            self.assertTrue(buffer.getvalue().endswith("\n789abcdefg"))
+            self.assertIn("7 characters truncated", buffer.getvalue())
+            self.assertIn(spill, buffer.getvalue())
+            with open(spill) as f:
+                self.assertEqual(f.read(), "0123456789abcdefg")
+
+    def test_small_output_is_returned_unchanged(self):
+        buffer = OutputBuffer(max_bytes=100)
+        buffer.write("Plan: 1 to add\n")
+        self.assertEqual(buffer.getvalue(), "Plan: 1 to add\n")
+
+
+class TestParseEvent(unittest.TestCase):
+    def test_resource_events(self):
+        event = parse_event(json.dumps({
+            "@level": "info", "@message": "aws_s3_bucket.b: Creation complete after 2s",
+            "type": "apply_complete",
+            "hook": {"resource": {"addr": "aws_s3_bucket.b"}, "action": "create", "elapsed_seconds": 2},
+        }))
+
+        self.assertEqual(event.type, "apply_complete")
+        self.assertEqual(event.address, "aws_s3_bucket.b")
+        self.assertEqual(event.action, "create")
+        self.assertEqual(event.elapsed, 2)
+
+    def test_diagnostic_and_summary_events(self):
+        diagnostic = parse_event('{"@level": "error", "@message": "Error: bad", "type": "diagnostic", '
+                                 '"diagnostic": {"severity": "error", "summary": "bad", "detail": "x"}}')
+        summary = parse_event('{"@message": "Plan: 1 to add", "type": "change_summary", '
+                              '"changes": {"add": 1, "change": 0, "remove": 0}}')
+
+        self.assertEqual(diagnostic.level, "error")
+        self.assertEqual(diagnostic.data["detail"], "x")
+        self.assertIsNone(diagnostic.address)
+        self.assertEqual(summary.data, {"add": 1, "change": 0, "remove": 0})
+
+    def test_ignores_non_json_lines(self):
+        for line in ("", "  ", "Terraform has been successfully initialized!", "{not json"):
+            self.assertIsNone(parse_event(line))
+
+
+if __name__ == "__main__":
+    unittest.main()
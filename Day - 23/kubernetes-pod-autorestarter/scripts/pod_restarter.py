@@ -5,7 +5,7 @@
 #!/usr/bin/env python3
 
 import logging
-from kubernetes import client, config
+from kubernetes import client, config, watch
 from kubernetes.client.exceptions import ApiException
 import time
 from datetime import datetime
@@ -17,20 +17,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+WATCH_TIMEOUT_SECONDS = 300  # Server-side watch timeout; the watch is re-opened from the last resourceVersion
+WATCH_RETRY_SECONDS = 5      # Pause before re-opening a watch that failed
+HTTP_GONE = 410              # resourceVersion too old: relist and start a new watch
+
+def is_failed(pod):
+    """True if the pod failed or one of its containers is waiting in CrashLoopBackOff/Error"""
+    if pod.status is None:
+        return False
+    if pod.status.phase == "Failed":
+        return True
+
+    # Check container statuses
+    for container_status in pod.status.container_statuses or []:
+        waiting_state = container_status.state.waiting if container_status.state else None
+        if waiting_state is not None and (
+            waiting_state.reason == "CrashLoopBackOff" or
+            waiting_state.reason == "Error"
+        ):
+            return True
+    return False
+
 class PodRestarter:
-    def __init__(self, namespace):
-        try:
-            # Try to load in-cluster config first, fall back to kubeconfig
-            config.load_incluster_config()
-        except config.ConfigException:
+    def __init__(self, namespace, api=None, watcher_factory=watch.Watch):
+        """
+        Args:
+            namespace: Namespace to monitor
+            api: CoreV1Api-compatible client; when given (e.g. a stub in tests)
+                 no cluster configuration is loaded
+            watcher_factory: Returns an object with stream(func, **kwargs) and stop(),
+                             like kubernetes.watch.Watch
+        """
+        if api is None:
             try:
-                config.load_kube_config()
-            except config.ConfigException as e:
-                logger.error("Could not configure kubernetes python client")
-                raise e
+                # Try to load in-cluster config first, fall back to kubeconfig
+                config.load_incluster_config()
+            except config.ConfigException:
+                try:
+                    config.load_kube_config()
+                except config.ConfigException as e:
+                    logger.error("Could not configure kubernetes python client")
+                    raise e
+            api = client.CoreV1Api()
 
         self.namespace = namespace
-        self.v1 = client.CoreV1Api()
+        self.v1 = api
+        self.watcher_factory = watcher_factory
+        self.resource_version = None  # Where the next watch resumes from
+        self.restarting = set()       # UIDs of pods deleted but not yet gone
         
     def get_failed_pods(self):
         """Get pods in CrashLoopBackOff or Error state"""
@@ -38,25 +72,7 @@ class PodRestarter:
         
         try:
             pods = self.v1.list_namespaced_pod(namespace=self.namespace)
-            
-            for pod in pods.items:
-                if pod.status.phase == "Failed":
-                    failed_pods.append(pod)
-                    continue
-                
-                # Check container statuses
-                if pod.status.container_statuses is None:
-                    continue
-                    
-                for container_status in pod.status.container_statuses:
-                    waiting_state = container_status.state.waiting
-                    if waiting_state is not None and (
-                        waiting_state.reason == "CrashLoopBackOff" or 
-                        waiting_state.reason == "Error"
-                    ):
-                        failed_pods.append(pod)
-                        break
-        
+            failed_pods = [pod for pod in pods.items if is_failed(pod)]
         except ApiException as e:
             logger.error(f"Failed to list pods: {e}")
         
@@ -99,6 +115,95 @@ class PodRestarter:
                 logger.error(f"Unexpected error in monitoring loop: {e}")
                 time.sleep(interval_seconds)
 
+    def handle_pod(self, pod):
+        """Restart a failed pod once; pods already being deleted are left alone."""
+        uid = pod.metadata.uid
+        if pod.metadata.deletion_timestamp is not None or uid in self.restarting:
+            return False
+        if not is_failed(pod):
+            return False
+        if self.restart_pod(pod):
+            self.restarting.add(uid)
+            return True
+        return False
+
+    def resync(self):
+        """
+        List the namespace once: restart anything already failed and remember
+        the list's resourceVersion so the watch starts exactly after it.
+        """
+        pods = self.v1.list_namespaced_pod(namespace=self.namespace)
+        current = {pod.metadata.uid for pod in pods.items}
+        self.restarting &= current
+        for pod in pods.items:
+            self.handle_pod(pod)
+        self.resource_version = pods.metadata.resource_version
+        logger.info(f"Listed {len(pods.items)} pods in {self.namespace} at resourceVersion {self.resource_version}")
+
+    def watch_once(self, timeout_seconds=WATCH_TIMEOUT_SECONDS):
+        """
+        Run one watch request from self.resource_version until the server ends it.
+
+        Returns:
+            bool: False if the resourceVersion expired and a relist is needed
+        """
+        watcher = self.watcher_factory()
+        try:
+            for event in watcher.stream(
+                self.v1.list_namespaced_pod,
+                namespace=self.namespace,
+                resource_version=self.resource_version,
+                timeout_seconds=timeout_seconds,
+                allow_watch_bookmarks=True,
+            ):
+                event_type = event["type"]
+                if event_type == "ERROR":
+                    # Older clients yield expiry as an event instead of raising
+                    status = event.get("raw_object") or {}
+                    if status.get("code") == HTTP_GONE:
+                        return False
+                    logger.error(f"Watch error: {status.get('message', status)}")
+                    continue
+
+                pod = event["object"]
+                self.resource_version = pod.metadata.resource_version
+                if event_type == "DELETED":
+                    self.restarting.discard(pod.metadata.uid)
+                elif event_type in ("ADDED", "MODIFIED"):
+                    self.handle_pod(pod)
+                # BOOKMARK events only advance the resourceVersion
+        except ApiException as e:
+            if e.status == HTTP_GONE:
+                return False
+            raise
+        finally:
+            watcher.stop()
+        return True
+
+    def watch_and_restart(self, timeout_seconds=WATCH_TIMEOUT_SECONDS, max_watches=None):
+        """
+        Event-driven alternative to monitor_and_restart: list once, then follow
+        the watch stream and act on each pod change as it happens. API load scales
+        with the rate of pod changes, not with pod count times poll frequency.
+
+        Args:
+            timeout_seconds: Server-side timeout of each watch request
+            max_watches: Stop after this many watch requests (None = forever)
+        """
+        logger.info(f"Starting pod watch for namespace {self.namespace}")
+        watches = 0
+        while max_watches is None or watches < max_watches:
+            try:
+                if self.resource_version is None:
+                    self.resync()
+                watches += 1
+                if not self.watch_once(timeout_seconds):
+                    logger.info(f"resourceVersion {self.resource_version} expired, relisting")
+                    self.resource_version = None
+            except Exception as e:
+                logger.error(f"Unexpected error in watch loop: {e}")
+                time.sleep(WATCH_RETRY_SECONDS)
+
 
 if __name__ == "__main__":
     import argparse
@@ -115,8 +220,16 @@ if __name__ == "__main__":
         default=60,
         help="Monitoring interval in seconds (default: 60)"
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Follow pod changes with a watch stream instead of polling every --interval"
+    )
     
     args = parser.parse_args()
     
     restarter = PodRestarter(args.namespace)
-    restarter.monitor_and_restart(args.interval)
+    if args.watch:
+        restarter.watch_and_restart()
+    else:
+        restarter.monitor_and_restart(args.interval)
@@ -0,0 +1,99 @@
+import unittest
+from types import SimpleNamespace
+
+from kubernetes.client.exceptions import ApiException
+
+from pod_restarter import PodRestarter
+
+def make_pod(name, resource_version, failed=True, deleting=False):
+    waiting = SimpleNamespace(reason="CrashLoopBackOff" if failed else "ContainerCreating")
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, uid=f"uid-{name}", resource_version=resource_version,
+                                 deletion_timestamp="now" if deleting else None),
+        status=SimpleNamespace(phase="Running",
+                               container_statuses=[SimpleNamespace(state=SimpleNamespace(waiting=waiting))]),
+    )
+
+def bookmark(resource_version):
+    return {"type": "BOOKMARK", "object": SimpleNamespace(
+        metadata=SimpleNamespace(resource_version=resource_version))}
+
+class StubApi:
+    """CoreV1Api stand-in: returns the queued pod lists and records deletions"""
+
+    def __init__(self, *lists):
+        self.lists = list(lists)  # (resourceVersion, pods) per list call
+        self.deleted = []
+
+    def list_namespaced_pod(self, namespace, **kwargs):
+        resource_version, pods = self.lists.pop(0)
+        return SimpleNamespace(items=pods, metadata=SimpleNamespace(resource_version=resource_version))
+
+    def delete_namespaced_pod(self, name, namespace, body):
+        self.deleted.append(name)
+
+class StubWatch:
+    """kubernetes.watch.Watch stand-in that replays one scripted stream per watch"""
+
+    def __init__(self, streams):
+        self.streams = streams
+        self.resource_versions = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, func, **kwargs):
+        self.resource_versions.append(kwargs["resource_version"])
+        events = self.streams.pop(0)
+        if isinstance(events, Exception):
+            raise events
+        yield from events
+
+    def stop(self):
+        pass
+
+class TestWatchAndRestart(unittest.TestCase):
+    def run_watches(self, api, streams):
+        watcher = StubWatch(streams)
+        restarter = PodRestarter("default", api=api, watcher_factory=watcher)
+        restarter.watch_and_restart(max_watches=len(streams))
+        return watcher
+
+    def test_events_restart_each_pod_once_and_expiry_relists(self):
+        api = StubApi(("10", [make_pod("a", "9")]),
+                      ("30", [make_pod("b", "14"), make_pod("c", "25")]))
+        watcher = self.run_watches(api, [
+            [
+                {"type": "MODIFIED", "object": make_pod("a", "11")},  # already restarted by the list
+                {"type": "ADDED", "object": make_pod("b", "12")},
+                {"type": "MODIFIED", "object": make_pod("b", "13")},
+                {"type": "MODIFIED", "object": make_pod("b", "14", deleting=True)},
+                {"type": "ADDED", "object": make_pod("ok", "15", failed=False)},
+                bookmark("20"),
+                {"type": "DELETED", "object": make_pod("a", "21")},
+                {"type": "ERROR", "raw_object": {"code": 410, "message": "too old resource version"}},
+            ],
+            [],
+        ])
+
+        # a comes from the first list, b from the watch and c from the relist;
+        # b is still being deleted when the relist sees it, so it is not deleted twice
+        self.assertEqual(api.deleted, ["a", "b", "c"])
+        self.assertEqual(watcher.resource_versions, ["10", "30"])
+        self.assertEqual(api.lists, [])
+
+    def test_expired_watch_exception_relists(self):
+        api = StubApi(("10", []), ("30", [make_pod("c", "25")]))
+        watcher = self.run_watches(api, [ApiException(status=410), []])
+
+        self.assertEqual(api.deleted, ["c"])
+        self.assertEqual(watcher.resource_versions, ["10", "30"])
+
+    def test_watch_resumes_from_last_event(self):
+        api = StubApi(("10", []))
+        watcher = self.run_watches(api, [[bookmark("20")], []])
+
+        self.assertEqual(watcher.resource_versions, ["10", "20"])
+
+if __name__ == '__main__':
+    unittest.main()